@@ -0,0 +1,73 @@
+"""
+Micro-benchmarks for MusicQueue operations on queues of different sizes.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_music_queue.py
+    python benchmarks/bench_music_queue.py --sizes 10 10000 100000 --repeat 7
+"""
+import argparse
+import statistics
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from music_queue import MusicQueue  # noqa: E402
+from youtube import YouTubeMetadata  # noqa: E402
+
+_SONG = YouTubeMetadata(
+    title="Benchmark Song",
+    duration=213,
+    thumbnail="https://i.ytimg.com/vi/dQw4w9WgXcQ/hqdefault.jpg",
+    webpage_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    video_id="dQw4w9WgXcQ",
+)
+
+
+def _filled(size: int) -> MusicQueue:
+    queue = MusicQueue()
+    for _ in range(size):
+        queue.add(_SONG)
+    return queue
+
+
+def _time(setup, operation, repeat: int) -> float:
+    """Return the median seconds of a single `operation(state)` call."""
+    samples = []
+    for _ in range(repeat):
+        state = setup()
+        samples.append(timeit.timeit(lambda: operation(state), number=1))
+    return statistics.median(samples)
+
+
+def bench(size: int, repeat: int) -> dict[str, float]:
+    half = max(1, size // 2)
+    return {
+        f"add x{size}": _time(MusicQueue, lambda q: [q.add(_SONG) for _ in range(size)], repeat),
+        "skip": _time(lambda: _filled(size), lambda q: q.skip(), repeat),
+        f"skip all ({size})": _time(lambda: _filled(size), lambda q: [q.skip() for _ in range(size)], repeat),
+        f"skip_n({half})": _time(lambda: _filled(size), lambda q: q.skip_n(half), repeat),
+        "remove(front)": _time(lambda: _filled(size), lambda q: q.remove(1), repeat),
+        f"remove(middle={half})": _time(lambda: _filled(size), lambda q: q.remove(half), repeat),
+        "remove(back)": _time(lambda: _filled(size), lambda q: q.remove(size), repeat),
+        "shuffle": _time(lambda: _filled(size), lambda q: q.shuffle(), repeat),
+        "peek(10)": _time(lambda: _filled(size), lambda q: q.peek(10), repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\nqueue size {size}")
+        for name, seconds in bench(size, args.repeat).items():
+            print(f"  {name:<24} {seconds * 1e6:12.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare memory per queued track: a list of full `YouTubeMetadata` models (what the
+queue used to hold) against `MusicQueue`'s compact `QueueEntry` records.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_queue_memory.py
+    python benchmarks/bench_queue_memory.py --entries 100000 --distinct 2000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from music_queue import MusicQueue  # noqa: E402
+from youtube import YouTubeMetadata  # noqa: E402
+
+# Realistic googlevideo URLs are around 1 kB
+_STREAM_URL_PADDING = "x" * 900
+
+
+def _make_metadata(i: int, distinct: int) -> YouTubeMetadata:
+    # Build fresh string objects per entry, like separate yt-dlp extractions would
+    n = i % distinct
+    video_id = f"{n:011d}"
+    return YouTubeMetadata(
+        title="".join(["Some Artist - Some Fairly Long Song Title (Official Video) #", str(n)]),
+        duration=200 + n % 100,
+        thumbnail="".join(["https://i.ytimg.com/vi/", video_id, "/hqdefault.jpg"]),
+        webpage_url="".join(["https://www.youtube.com/watch?v=", video_id]),
+        stream_url="".join(["https://rr1---sn.googlevideo.com/videoplayback?expire=1&id=", video_id, _STREAM_URL_PADDING]),
+        video_id=video_id,
+    )
+
+
+def _measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=100_000, help="Number of distinct songs among the entries")
+    args = parser.parse_args()
+
+    def build_models():
+        return [_make_metadata(i, args.distinct) for i in range(args.entries)]
+
+    def build_queue():
+        queue = MusicQueue()
+        for i in range(args.entries):
+            # The full model is only alive while it is being enqueued
+            queue.add(_make_metadata(i, args.distinct))
+        return queue
+
+    for label, build in (("YouTubeMetadata list", build_models), ("MusicQueue entries", build_queue)):
+        total = _measure(build)
+        print(f"{label:<22} {total / 1024 / 1024:8.1f} MiB  {total / args.entries:8.1f} bytes/entry")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare per-call latency of a fresh `YoutubeDL` per call against the pooled instances.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_ytdl_pool.py                 # setup cost only, no network
+    python benchmarks/bench_ytdl_pool.py --url <video>   # full extract_info round trips
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from yt_dlp import YoutubeDL  # noqa: E402
+
+from youtube import EXTRACT_OPTS, extract_pool  # noqa: E402
+
+
+def _report(label: str, samples: list[float]) -> None:
+    samples_ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<10} n={len(samples_ms):<4} "
+        f"mean={statistics.mean(samples_ms):8.2f} ms  "
+        f"median={statistics.median(samples_ms):8.2f} ms  "
+        f"max={max(samples_ms):8.2f} ms"
+    )
+
+
+def bench_fresh(iterations: int, url: str | None) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with YoutubeDL(EXTRACT_OPTS) as ydl:
+            if url:
+                ydl.extract_info(url, download=False)
+            else:
+                ydl.get_info_extractor("Youtube")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_pooled(iterations: int, url: str | None) -> list[float]:
+    extract_pool.warm_up()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with extract_pool.checkout() as ydl:
+            if url:
+                ydl.extract_info(url, download=False)
+            else:
+                ydl.get_info_extractor("Youtube")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--url", help="Video URL to extract (performs network requests)")
+    args = parser.parse_args()
+
+    _report("fresh", bench_fresh(args.iterations, args.url))
+    _report("pooled", bench_pooled(args.iterations, args.url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Container used for each source codec (stream copy, no re-encoding) and the codec
+# a cached file is played back as
+_CONTAINERS = {"opus": (".webm", "webm"), "aac": (".m4a", "mp4")}
+_EXTENSION_CODECS = {".webm": "opus", ".m4a": "aac"}
+
+# Play counts are only kept for this many recently played videos
+_MAX_TRACKED_PLAYS = 10_000
+
+
+class AudioDiskCache:
+    """
+    Directory of downloaded audio files named `<video_id>.<ext>`, for tracks that
+    are played over and over.
+
+    A track is downloaded once it has been played `min_plays` times. Downloads run
+    one at a time on a background thread: FFmpeg copies the already resolved
+    stream into a temporary file, which is then renamed into place, so a file is
+    either complete or absent. Playing a file bumps its modification time, and the
+    directory is kept below `max_bytes` by deleting the least recently played files.
+    Since all state lives in the file system, several bot processes can share one
+    cache directory.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, min_plays: int = 2, max_track_seconds: int = 1200):
+        self.directory = Path(directory)
+        self._incoming = self.directory / ".incoming"
+        self._incoming.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.min_plays = max(1, min_plays)
+        self.max_track_seconds = max_track_seconds
+
+        self._plays: OrderedDict[str, int] = OrderedDict()
+        self._queued: set[str] = set()
+        self._downloads: queue.Queue[tuple[str, str, str, int] | None] = queue.Queue()
+        self._process: subprocess.Popen | None = None
+        self._closed = threading.Event()
+
+        self.hits = 0
+        self.misses = 0
+        self.downloads = 0
+        self.failed_downloads = 0
+        self.evictions = 0
+        self.size_bytes = 0
+
+        self._worker = threading.Thread(target=self._download_loop, name="audio-cache-downloader", daemon=True)
+        self._worker.start()
+
+    def lookup(self, video_id: str) -> tuple[Path, str] | None:
+        """Return the cached file and its codec, or None if the track is not cached."""
+        for extension, codec in _EXTENSION_CODECS.items():
+            path = self.directory / f"{video_id}{extension}"
+            try:
+                # Doubles as the existence check and marks the file as recently played
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            self.hits += 1
+            return path, codec
+        self.misses += 1
+        return None
+
+    def record_play(self, video_id: str, stream_url: str, codec: str | None, duration: int | None) -> None:
+        """Count a play of a streamed track and queue its download once it is played often enough."""
+        plays = self._plays.pop(video_id, 0) + 1
+        self._plays[video_id] = plays
+        while len(self._plays) > _MAX_TRACKED_PLAYS:
+            self._plays.popitem(last=False)
+
+        if plays < self.min_plays or video_id in self._queued or self._closed.is_set():
+            return
+        if codec is not None and codec.startswith("mp4a"):
+            codec = "aac"
+        if codec not in _CONTAINERS or not duration or duration > self.max_track_seconds:
+            return
+        self._queued.add(video_id)
+        self._downloads.put((video_id, stream_url, codec, duration))
+
+    def _download_loop(self) -> None:
+        try:
+            # Measure the directory (and apply a possibly lowered size limit) up front
+            self._evict_overflow()
+        except OSError as exc:
+            logger.warning("Could not scan audio cache directory %s: %s", self.directory, exc)
+        while True:
+            job = self._downloads.get()
+            if job is None:
+                return
+            video_id = job[0]
+            try:
+                self._download(*job)
+                self._evict_overflow()
+            except Exception as exc:
+                self.failed_downloads += 1
+                logger.warning("Caching audio of %s failed: %s", video_id, exc)
+            finally:
+                self._queued.discard(video_id)
+
+    def _download(self, video_id: str, stream_url: str, codec: str, duration: int) -> None:
+        extension, container = _CONTAINERS[codec]
+        target = self.directory / f"{video_id}{extension}"
+        if target.exists():
+            return
+        partial = self._incoming / f"{video_id}.{os.getpid()}{extension}"
+        command = [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+            "-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5",
+            "-i", stream_url,
+            "-vn", "-c:a", "copy", "-f", container, str(partial),
+        ]
+        started = time.monotonic()
+        self._process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            _, stderr = self._process.communicate(timeout=max(120, duration))
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.communicate()
+            raise RuntimeError("download timed out")
+        finally:
+            returncode = self._process.returncode
+            self._process = None
+
+        if returncode != 0 or self._closed.is_set():
+            partial.unlink(missing_ok=True)
+            raise RuntimeError(stderr.decode(errors="replace").strip() or f"ffmpeg exited with {returncode}")
+        os.replace(partial, target)
+        self.downloads += 1
+        logger.info("Cached audio of %s (%.1f MB in %.1f s)",
+                    video_id, target.stat().st_size / 1e6, time.monotonic() - started)
+
+    def _evict_overflow(self) -> None:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and os.path.splitext(entry.name)[1] in _EXTENSION_CODECS:
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        # Oldest modification time == least recently played
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # Already evicted by another process sharing the directory
+            total -= size
+            self.evictions += 1
+        self.size_bytes = total
+
+    def close(self) -> None:
+        """Stop the downloader, abandoning a download in progress."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        process = self._process
+        if process is not None:
+            process.kill()
+        self._downloads.put(None)
+        self._worker.join(timeout=5)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "downloads": self.downloads,
+            "failed_downloads": self.failed_downloads,
+            "queued_downloads": len(self._queued),
+            "evictions": self.evictions,
+            "size_bytes": self.size_bytes,
+        }
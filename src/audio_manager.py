@@ -1,22 +1,237 @@
+import asyncio
+import atexit
 import logging
-from typing import Callable, Optional
+import statistics
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
 
 import discord
 from discord.ext import commands
 
+from audio_cache import AudioDiskCache
+from audio_sources import BufferedAudioSource, GainSource, PreparedSource, TrackedSource
 from exceptions import PlaybackError, HumanError
-from music_queue import music_queue
+from extraction_executor import Priority
+from loudness import loudness_analyzer
+from music_queue import QueueEntry
+from player import GuildPlayer, NowPlaying, get_player
+from voice_manager import voice_connections
+from youtube import YouTubeMetadata, extract_info
 
 logger = logging.getLogger(__name__)
 
-# Global volume state (0.0 to 1.0)
-_current_volume: float = 0.5
+FFMPEG_OPTS = {
+    "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
+    "options": "-vn",
+}
 
+# "pcm": FFmpeg decodes to PCM, volume is scaled in Python and discord.py encodes Opus.
+# "opus": FFmpeg hands out Opus packets (stream copy for Opus sources at 100% volume,
+# otherwise encoded by FFmpeg with the volume applied as a filter).
+playback_mode: str = "pcm"
 
-async def play_url(ctx: commands.Context, url: str, on_complete: Optional[Callable] = None) -> None:
+# Frames read ahead of playback on a separate thread (0 reads in the voice thread)
+read_ahead_frames: int = 50
+
+# Underrun counters of finished read-ahead buffers (all guilds)
+_buffer_totals = {"tracks": 0, "frames": 0, "underruns": 0, "underrun_seconds": 0.0}
+
+# A stream that ends or fails before its duration is restarted at the position it
+# reached, up to `resume_attempts` times in a row. Ending within the tolerance
+# counts as complete (durations are rounded), and a restart that played this many
+# frames resets the count.
+resume_attempts: int = 3
+_END_TOLERANCE_SECONDS = 3.0
+_RESUME_PROGRESS_FRAMES = 500
+_resume_totals = {"seeks": 0, "resumes": 0, "failed": 0}
+
+# Songs that fail to play are skipped after waiting base * 2^(n-1) seconds for the
+# n-th failure in a row, at most the max
+_BACKOFF_BASE_SECONDS = 1.0
+_BACKOFF_MAX_SECONDS = 30.0
+_failure_counts = {"extract": 0, "extract_timeout": 0, "voice": 0, "start": 0, "stream": 0}
+
+# Gapless playback: the next track's FFmpeg process is started this many seconds
+# before the current track ends and pre-buffers this many frames.
+gapless_enabled: bool = True
+gapless_preroll_seconds: float = 5.0
+gapless_prebuffer_frames: int = 50
+
+# Optional local copies of frequently played tracks (see init_audio_cache)
+disk_cache: AudioDiskCache | None = None
+
+# Time between the end of one track and the first frame of the next (all guilds)
+_gap_samples: deque[float] = deque(maxlen=100)
+
+
+def configure_gapless(enabled: bool, preroll_seconds: float, prebuffer_frames: int) -> None:
+    """Configure gapless transitions between queued tracks."""
+    global gapless_enabled, gapless_preroll_seconds, gapless_prebuffer_frames
+    gapless_enabled = enabled
+    gapless_preroll_seconds = preroll_seconds
+    gapless_prebuffer_frames = prebuffer_frames
+
+
+def configure_playback(mode: str, read_ahead: int = 50, resumes: int = 3) -> None:
+    """
+    Select the playback pipeline ("pcm" or "opus"), the read-ahead buffer size in
+    frames and how often in a row a broken-off stream is resumed.
+    """
+    global playback_mode, read_ahead_frames, resume_attempts
+    if mode not in ("pcm", "opus"):
+        raise ValueError(f"Unknown playback mode: {mode}")
+    playback_mode = mode
+    read_ahead_frames = read_ahead
+    resume_attempts = resumes
+
+
+def init_audio_cache(directory: Path, max_bytes: int, min_plays: int, max_track_seconds: int) -> None:
+    """Enable the disk cache for frequently played tracks; it is stopped at interpreter exit."""
+    global disk_cache
+    disk_cache = AudioDiskCache(directory, max_bytes, min_plays=min_plays, max_track_seconds=max_track_seconds)
+    atexit.register(disk_cache.close)
+
+
+def _locate_audio(
+    stream_url: str, codec: Optional[str], video_id: Optional[str]
+) -> tuple[str, Optional[str], bool]:
+    """Return (input, codec, is_local_file) for a track, preferring a cached local copy."""
+    if disk_cache is not None and video_id:
+        cached = disk_cache.lookup(video_id)
+        if cached is not None:
+            path, cached_codec = cached
+            return str(path), cached_codec, True
+    return stream_url, codec, False
+
+
+def _record_buffer_stats(source: BufferedAudioSource) -> None:
+    # Runs in the voice thread; a lost update of these counters is harmless
+    _buffer_totals["tracks"] += 1
+    _buffer_totals["frames"] += source.frames_played
+    _buffer_totals["underruns"] += source.underruns
+    _buffer_totals["underrun_seconds"] += source.underrun_seconds
+
+
+def get_buffer_stats() -> dict[str, float]:
+    """Return read-ahead buffer counters accumulated over all finished tracks."""
+    return {"read_ahead_frames": read_ahead_frames, **_buffer_totals}
+
+
+def _create_source(
+    url: str, codec: Optional[str], volume: float, local: bool = False, start_at: float = 0.0
+) -> discord.AudioSource:
+    """Spawn FFmpeg for the given stream URL or local file using the configured playback mode."""
+    source = _create_ffmpeg_source(url, codec, volume, local, start_at)
+    if read_ahead_frames > 0:
+        source = BufferedAudioSource(source, read_ahead_frames, on_cleanup=_record_buffer_stats)
+    return source
+
+
+def _create_ffmpeg_source(
+    url: str, codec: Optional[str], volume: float, local: bool, start_at: float
+) -> discord.AudioSource:
+    # The reconnect options only apply to network input
+    before_options = "" if local else FFMPEG_OPTS["before_options"]
+    if start_at > 0:
+        # Input-side seek: FFmpeg requests the stream from (about) that position on
+        before_options = f"{before_options} -ss {start_at:.2f}".lstrip()
+    if playback_mode == "opus":
+        # Opus sources at unity gain are passed through without decoding
+        passthrough = codec == "opus" and volume == 1.0
+        options = FFMPEG_OPTS["options"]
+        if volume != 1.0:
+            options += f" -af volume={volume:.2f}"
+        return discord.FFmpegOpusAudio(
+            url,
+            executable="ffmpeg",
+            codec="opus" if passthrough else None,
+            before_options=before_options,
+            options=options,
+        )
+
+    return discord.FFmpegPCMAudio(
+        url,
+        executable="ffmpeg",
+        before_options=before_options,
+        options=FFMPEG_OPTS["options"],
+    )
+
+
+def get_gap_stats() -> dict[str, float]:
+    """Return statistics (in milliseconds) for the silence between consecutive tracks."""
+    if not _gap_samples:
+        return {"count": 0}
+    samples_ms = [gap * 1000 for gap in _gap_samples]
+    return {
+        "count": len(samples_ms),
+        "last_ms": samples_ms[-1],
+        "mean_ms": statistics.mean(samples_ms),
+        "median_ms": statistics.median(samples_ms),
+        "max_ms": max(samples_ms),
+    }
+
+
+def _record_first_frame(player: GuildPlayer, timestamp: float) -> None:
+    if player.track_ended_at is not None:
+        gap = timestamp - player.track_ended_at
+        player.track_ended_at = None
+        _gap_samples.append(gap)
+        logger.debug("Gap between tracks in guild %s: %.1f ms", player.guild_id, gap * 1000)
+
+
+async def _prepare_next(player: GuildPlayer) -> None:
+    """Start FFmpeg for the next queued track and pre-buffer its first frames."""
+    upcoming = player.queue.peek(1)
+    if not upcoming:
+        return
+    song = upcoming[0]
+    try:
+        meta = await player.prefetcher.ensure_fresh(song, margin=song.duration + 60, priority=Priority.PREFETCH)
+    except Exception as exc:
+        logger.warning("Could not prepare next track %s: %s", song.webpage_url, exc)
+        return
+    if player.queue.peek(1) != [song]:
+        # The queue moved on while we were resolving
+        return
+
+    location, codec, local = _locate_audio(meta.stream_url, meta.codec, meta.video_id)
+    if meta.loudness is None:
+        loudness_analyzer.request(meta.video_id, location, meta.duration)
+    volume = player.volume * loudness_analyzer.gain_for(meta.loudness)
+    if player.prepared is not None and player.prepared[:2] == (location, volume):
+        return
+    player.discard_prepared()
+    source = PreparedSource(_create_source(location, codec, volume, local))
+    task = asyncio.ensure_future(asyncio.to_thread(source.prebuffer, gapless_prebuffer_frames))
+    player.prepared = (location, volume, source, task)
+
+
+def stop_audio(ctx: commands.Context) -> None:
+    """Stop the guild's current audio without triggering its completion callback."""
+    player = get_player(ctx)
+    player.generation += 1
+    # Whatever starts next doesn't follow on from a track that ended
+    player.track_ended_at = None
+    voice_client: discord.VoiceClient | None = ctx.guild.voice_client  # type: ignore[attr-defined]
+    if voice_client:
+        voice_client.stop()
+
+
+async def play_url(
+    ctx: commands.Context,
+    url: str,
+    duration: Optional[int] = None,
+    codec: Optional[str] = None,
+    video_id: Optional[str] = None,
+    loudness: Optional[float] = None,
+) -> None:
     """
     Join the command author's voice channel (if not already connected) and
-    stream the provided audio URL via FFmpeg.
+    stream the provided audio URL via FFmpeg. Tracks in the disk cache are
+    played from their local file instead. When the track ends, the guild's
+    runner task continues with the next song in the queue.
 
     Parameters
     ----------
@@ -24,8 +239,16 @@ async def play_url(ctx: commands.Context, url: str, on_complete: Optional[Callab
         The Discord command context
     url : str
         The audio URL to stream
-    on_complete : Optional[Callable]
-        Callback function to execute when playback completes
+    duration : Optional[int]
+        Track length in seconds; enables starting the next track ahead of time
+        and resuming a stream that breaks off early
+    codec : Optional[str]
+        Audio codec of the stream; Opus streams can skip decoding in opus mode
+    video_id : Optional[str]
+        YouTube video ID; used to find and populate the disk cache
+    loudness : Optional[float]
+        Measured integrated loudness (LUFS) for normalization; if unknown the
+        track is played as is and measured in the background
 
     Raises
     ------
@@ -33,6 +256,8 @@ async def play_url(ctx: commands.Context, url: str, on_complete: Optional[Callab
         If the user is not connected to voice, the bot is already connected to
         another channel, or FFmpeg fails to start.
     """
+    player = get_player(ctx)
+
     voice_state = ctx.author.voice
     if voice_state is None:
         raise PlaybackError("You are not connected to a voice channel.")
@@ -40,42 +265,103 @@ async def play_url(ctx: commands.Context, url: str, on_complete: Optional[Callab
     channel = voice_state.channel
     voice_client: discord.VoiceClient | None = ctx.guild.voice_client  # type: ignore[attr-defined]
 
-    if voice_client and voice_client.channel != channel:
+    if voice_client and voice_client.is_connected() and voice_client.channel != channel:
         raise PlaybackError("I am already connected to another voice channel.")
 
-    if not voice_client:
-        voice_client = await channel.connect()
+    # Reuses the guild's warm connection, or connects (resuming a dropped session if possible)
+    try:
+        voice_client = await voice_connections.connect(channel)
+    except Exception as exc:
+        raise PlaybackError("Failed to connect to the voice channel.") from exc
+    player.voice_client = voice_client
 
     # Stop any previous audio
     if voice_client.is_playing() or voice_client.is_paused():
-        voice_client.stop()
+        stop_audio(ctx)
 
-    ffmpeg_opts = {
-        "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
-        "options": "-vn",
-    }
+    track = NowPlaying(url, duration, codec, video_id, loudness)
+    await _start_track(player, voice_client, track)
 
-    source = discord.FFmpegPCMAudio(
-        url,
-        executable="ffmpeg",
-        **ffmpeg_opts,
-    )
+
+async def _start_track(
+    player: GuildPlayer, voice_client: discord.VoiceClient, track: NowPlaying, start_at: float = 0.0
+) -> None:
+    """Start FFmpeg for a track, `start_at` seconds in, and hand it to the voice client."""
+    location, codec, local = _locate_audio(track.url, track.codec, track.video_id)
+    if start_at == 0.0:
+        if disk_cache is not None and track.video_id and not local:
+            # Only queues a background download, never waits for it
+            disk_cache.record_play(track.video_id, track.url, codec, track.duration)
+        if track.loudness is None:
+            loudness_analyzer.request(track.video_id, location, track.duration)
+    player.track_gain = loudness_analyzer.gain_for(track.loudness)
+    volume = player.effective_volume
+
+    # In opus mode the volume is baked into the FFmpeg process, so a prepared
+    # source is only reusable if the volume hasn't changed since
+    prepared = player.prepared
+    if (
+        start_at == 0.0
+        and prepared is not None
+        and prepared[0] == location
+        and (playback_mode == "pcm" or prepared[1] == volume)
+    ):
+        # The source was started while the previous track was ending
+        _, _, source, task = prepared
+        player.prepared = None
+        await task
+    else:
+        # A seek or resume keeps the next track's prepared source
+        if start_at == 0.0:
+            player.discard_prepared()
+        source = _create_source(location, codec, volume, local, start_at)
     
-    # Apply volume control
-    source = discord.PCMVolumeTransformer(source, volume=_current_volume)
+    # Apply volume control (Opus sources get their volume inside FFmpeg)
+    if not source.is_opus():
+        if GainSource.available:
+            source = GainSource(source, volume=volume)
+        else:
+            source = discord.PCMVolumeTransformer(source, volume=volume)
+
+    loop = asyncio.get_running_loop()
+
+    def _near_end() -> None:
+        # Runs in the voice thread
+        loop.call_soon_threadsafe(lambda: asyncio.ensure_future(_prepare_next(player)))
+
+    source = TrackedSource(
+        source,
+        duration=track.duration,
+        near_end_seconds=gapless_preroll_seconds,
+        on_near_end=_near_end if gapless_enabled else None,
+        on_first_frame=lambda timestamp: _record_first_frame(player, timestamp),
+        start_offset=start_at,
+        timing=player.frame_timing,
+    )
+    track.source = source
+    player.now_playing = track
+    generation = player.generation
+    voice_connections.touch(player.guild_id)
+    _ensure_runner(player)
 
     def _after(err: Exception | None) -> None:
+        # Runs in the voice thread; everything else is handed to the event loop
+        if generation != player.generation:
+            if err:
+                logger.error("Player error: %s", err)
+            return
+        if _broke_off(track, source, err):
+            logger.warning("Stream of %s broke off at %.1f s (%s), resuming",
+                           track.video_id or track.url, source.position, err or "ended early")
+            loop.call_soon_threadsafe(lambda: asyncio.ensure_future(_resume(player, track, generation)))
+            return
         if err:
             logger.error("Player error: %s", err)
-        else:
-            # Song completed successfully, trigger callback if provided
-            if on_complete:
-                try:
-                    # Use asyncio to run the callback in the event loop
-                    import asyncio
-                    asyncio.create_task(on_complete())
-                except Exception as callback_err:
-                    logger.error("Callback error: %s", callback_err)
+        # A stream that never produced audio is dead, e.g. its URL expired
+        track.failed = err is not None or source.frames == 0
+        if not track.failed:
+            player.track_ended_at = time.perf_counter()
+        loop.call_soon_threadsafe(_finish_track, player, track, generation)
 
     try:
         voice_client.play(source, after=_after)
@@ -84,34 +370,265 @@ async def play_url(ctx: commands.Context, url: str, on_complete: Optional[Callab
         raise PlaybackError("Failed to start playback.") from exc
 
 
-async def play_next_in_queue(ctx: commands.Context) -> bool:
+def _broke_off(track: NowPlaying, source: TrackedSource, err: Exception | None) -> bool:
+    """True if a track failed or ended before its duration and should be resumed where it stopped."""
+    if err is None and (not track.duration or source.position >= track.duration - _END_TOLERANCE_SECONDS):
+        return False
+    if source.frames == 0 and source.start_offset == 0:
+        # Never started: resuming on the same URL won't help, re-extracting might
+        return False
+    if source.frames >= _RESUME_PROGRESS_FRAMES:
+        # The last (re)start played for a while, so this is a new interruption
+        track.resumes = 0
+    if track.resumes >= resume_attempts:
+        return False
+    track.resumes += 1
+    return True
+
+
+async def _resume(player: GuildPlayer, track: NowPlaying, generation: int) -> None:
+    """Restart a track whose stream broke off at the position it reached, on the same stream URL."""
+    if generation != player.generation or player.now_playing is not track:
+        return
+    # The stream may have broken off because the voice connection dropped
+    voice_client = await _voice_client(player)
+    if voice_client is None or generation != player.generation:
+        return
+    _resume_totals["resumes"] += 1
+    try:
+        await _start_track(player, voice_client, track, start_at=track.position)
+    except Exception as exc:
+        _resume_totals["failed"] += 1
+        logger.error("Could not resume %s: %s", track.video_id or track.url, exc)
+        track.failed = True
+        _finish_track(player, track, generation)
+
+
+def _finish_track(player: GuildPlayer, track: NowPlaying, generation: int) -> None:
+    """Wake the guild's runner task for a track that ended on its own."""
+    if generation != player.generation:
+        return
+    player.finished_track = track
+    player.finished.set()
+
+
+def _ensure_runner(player: GuildPlayer) -> None:
+    if player.runner is None or player.runner.done():
+        player.runner = asyncio.get_running_loop().create_task(_run_queue(player))
+
+
+async def _run_queue(player: GuildPlayer) -> None:
     """
-    Play the next song in the queue automatically.
-    
+    Per-guild task that continues with the next song whenever a track ends or is
+    skipped. It is the only task that moves the queue forward. A track whose
+    stream failed is retried once with a re-extracted stream URL.
+    """
+    while True:
+        await player.finished.wait()
+        player.finished.clear()
+        track, player.finished_track = player.finished_track, None
+        if track is not None and player.now_playing is track:
+            player.now_playing = None
+            try:
+                if not (track.failed and await _retry_failed(player, track)):
+                    await _advance(player)
+            except Exception:
+                logger.exception("Failed to advance the queue of guild %s", player.guild_id)
+        if player.skip_requests:
+            await _skip(player)
+
+
+async def _skip(player: GuildPlayer) -> None:
+    requests, player.skip_requests = player.skip_requests, []
+    played = player.is_playing()
+    try:
+        current = player.now_playing
+        # A skip whose track already ended (e.g. while the runner was starting the
+        # next one) is answered by that next song instead of skipping it as well
+        if any(current is None or current is target for target, _ in requests):
+            player.generation += 1
+            player.now_playing = None
+            if player.voice_client is not None:
+                player.voice_client.stop()
+            played = await _advance(player)
+    except Exception:
+        logger.exception("Failed to skip in guild %s", player.guild_id)
+        played = player.is_playing()
+    finally:
+        for _, done in requests:
+            if not done.done():
+                done.set_result(played)
+
+
+async def skip_tracks(ctx: commands.Context, n: int = 1) -> bool:
+    """
+    Skip the current track and the `n - 1` songs after it, and continue with the
+    next song in the queue, skipping songs that fail to play. The guild's runner
+    task does the advancing, so a skip cannot race a track that is ending.
+
     Returns
     -------
     bool
-        True if a song was played, False if queue is empty
+        True if a song was played, False if the queue ran empty
     """
-    next_song = music_queue.skip()
-    if next_song:
-        music_queue.set_current(next_song)
+    player = get_player(ctx)
+    if n > 1:
+        player.queue.skip_n(n - 1)
+    done = asyncio.get_running_loop().create_future()
+    player.skip_requests.append((player.now_playing, done))
+    player.finished.set()
+    _ensure_runner(player)
+    return await done
+
+
+async def seek(ctx: commands.Context, position: float) -> None:
+    """
+    Continue the current track at another position. The stream URL is reused, so
+    this only restarts FFmpeg with an input-side seek; paused playback resumes.
+
+    Parameters
+    ----------
+    ctx : commands.Context
+        The Discord command context
+    position : float
+        Target position in seconds from the start of the track
+
+    Raises
+    ------
+    HumanError
+        If no audio is playing or the position lies outside the track.
+    """
+    player = get_player(ctx)
+    track = player.now_playing
+    voice_client: discord.VoiceClient | None = ctx.guild.voice_client  # type: ignore[attr-defined]
+    if track is None or not voice_client or not (voice_client.is_playing() or voice_client.is_paused()):
+        raise HumanError("No audio is currently playing.")
+    if position < 0 or (track.duration and position >= track.duration):
+        minutes, seconds = divmod(track.duration or 0, 60)
+        raise HumanError(f"Position must be between 0:00 and {minutes}:{seconds:02d}.")
+
+    stop_audio(ctx)
+    track.resumes = 0
+    _resume_totals["seeks"] += 1
+    await _start_track(player, voice_client, track, start_at=position)
+
+
+def get_position(ctx: commands.Context) -> Optional[float]:
+    """Return the position (seconds) in the current track, or None if nothing is playing."""
+    track = get_player(ctx).now_playing
+    return track.position if track is not None else None
+
+
+def get_resume_stats() -> dict[str, int]:
+    """Return counters of seeks and of resumes after broken-off streams (all guilds)."""
+    return dict(_resume_totals)
+
+
+async def _retry_failed(player: GuildPlayer, track: NowPlaying) -> bool:
+    """Replay a track whose stream failed from a newly extracted stream URL, once."""
+    _failure_counts["stream"] += 1
+    song = player.queue.get_current()
+    if track.refreshed or song is None or song.video_id != track.video_id:
+        return False
+    logger.info("Re-extracting %s after its stream failed at %.1f s", song.webpage_url, track.position)
+    try:
+        return await _play_entry(player, song, refresh=True, start_at=track.position)
+    except Exception as exc:
+        logger.error("Retry of %s failed: %s", song.webpage_url, exc)
+        return False
+
+
+async def _voice_client(player: GuildPlayer) -> discord.VoiceClient | None:
+    """Return the player's voice client, reconnecting it after a dropped connection."""
+    voice_client = player.voice_client
+    if voice_client is None or not voice_client.is_connected():
+        voice_client = await voice_connections.reconnect(player.guild_id)
+        player.voice_client = voice_client
+    return voice_client
+
+
+async def _play_entry(
+    player: GuildPlayer, song: QueueEntry | YouTubeMetadata, refresh: bool = False, start_at: float = 0.0
+) -> bool:
+    """
+    Resolve a song and start it on the player's voice connection. Returns False
+    if something else started playing in the meantime; failures are counted by
+    cause and re-raised.
+    """
+    try:
+        if refresh:
+            meta = await extract_info(song.webpage_url, refresh=True, guild_id=player.guild_id)
+        else:
+            # Usually a cache hit: the prefetcher keeps upcoming stream URLs fresh
+            meta = await player.prefetcher.ensure_fresh(song)
+    except Exception as exc:
+        timed_out = isinstance(exc, asyncio.TimeoutError) or isinstance(exc.__context__, asyncio.TimeoutError)
+        _failure_counts["extract_timeout" if timed_out else "extract"] += 1
+        raise
+
+    voice_client = await _voice_client(player)
+    if voice_client is None:
+        _failure_counts["voice"] += 1
+        raise PlaybackError("I am not connected to a voice channel.")
+    if voice_client.is_playing() or voice_client.is_paused():
+        # A command started another song while we were extracting
+        return False
+
+    player.queue.set_current(meta)
+    track = NowPlaying(meta.stream_url, meta.duration, meta.codec, meta.video_id, meta.loudness, refreshed=refresh)
+    try:
+        await _start_track(player, voice_client, track, start_at=start_at)
+    except Exception:
+        _failure_counts["start"] += 1
+        raise
+    return True
+
+
+async def _advance(player: GuildPlayer) -> bool:
+    """
+    Play the next song in the queue, skipping songs that fail even after one
+    retry with a re-extracted stream URL. Consecutive failures back off
+    exponentially, so a run of dead entries doesn't turn into a burst of yt-dlp
+    calls.
+    """
+    generation = player.generation
+    failures = 0
+    while (song := player.queue.skip()) is not None:
+        for refresh in (False, True):
+            try:
+                return await _play_entry(player, song, refresh=refresh)
+            except Exception as exc:
+                logger.warning("Failed to play %s%s: %s", song.webpage_url, " (re-extracted)" if refresh else "", exc)
+                if player.voice_client is None:
+                    # Not connected and reconnecting failed, nothing to play into
+                    player.queue.set_current(None)
+                    player.track_ended_at = None
+                    return False
+
+        failures += 1
+        # The wait below is backoff, not a gap between tracks
+        player.track_ended_at = None
+        delay = min(_BACKOFF_BASE_SECONDS * 2 ** (failures - 1), _BACKOFF_MAX_SECONDS)
+        logger.error("Skipping %s in guild %s, next song in %.1f s", song.webpage_url, player.guild_id, delay)
         try:
-            # Create a callback that will play the next song when this one ends
-            async def queue_callback():
-                await play_next_in_queue(ctx)
-            
-            await play_url(ctx, next_song.stream_url, on_complete=queue_callback)
-            return True
-        except PlaybackError as exc:
-            logger.error("Failed to play next song in queue: %s", exc)
-            # Try to continue with the next song
-            await play_next_in_queue(ctx)
+            # A `!skip` ends the wait; the runner then handles it
+            await asyncio.wait_for(player.finished.wait(), delay)
+            return False
+        except asyncio.TimeoutError:
+            pass
+        if generation != player.generation or player.is_playing():
+            # Someone stopped or started a song while we were waiting
             return False
-    else:
-        # Queue is empty, clear current song
-        music_queue.set_current(None)
-        return False
+
+    # Queue is empty, clear current song; the next `!play` after an idle period isn't a gap
+    player.queue.set_current(None)
+    player.track_ended_at = None
+    return False
+
+
+def get_failure_stats() -> dict[str, int]:
+    """Return how often queued songs failed to play, by cause (all guilds)."""
+    return dict(_failure_counts)
 
 
 async def stop_playback(ctx: commands.Context) -> None:
@@ -128,9 +645,11 @@ async def stop_playback(ctx: commands.Context) -> None:
     if not voice_client or (not voice_client.is_playing() and not voice_client.is_paused()):
         raise HumanError("No audio is currently playing.")
     
-    voice_client.stop()
-    music_queue.clear()
-    music_queue.set_current(None)
+    stop_audio(ctx)
+    player = get_player(ctx)
+    player.now_playing = None
+    player.queue.clear()
+    player.queue.set_current(None)
 
 
 async def pause_playback(ctx: commands.Context) -> None:
@@ -169,7 +688,7 @@ async def resume_playback(ctx: commands.Context) -> None:
 
 async def set_volume(ctx: commands.Context, volume: int) -> None:
     """
-    Set the playback volume for future audio.
+    Set the guild's playback volume for future audio.
     
     Parameters
     ----------
@@ -183,26 +702,26 @@ async def set_volume(ctx: commands.Context, volume: int) -> None:
     HumanError
         If volume is not between 0 and 100
     """
-    global _current_volume
-    
     if not (0 <= volume <= 100):
         raise HumanError("Volume level must be between 0 and 100.")
     
-    _current_volume = volume / 100.0
+    player = get_player(ctx)
+    player.volume = volume / 100.0
     
-    # If audio is currently playing, update its volume
+    # If audio is currently playing, update its volume (not possible for Opus
+    # sources, whose volume is fixed when FFmpeg starts)
     voice_client: discord.VoiceClient | None = ctx.guild.voice_client  # type: ignore[attr-defined]
     if voice_client and hasattr(voice_client.source, 'volume'):
-        voice_client.source.volume = _current_volume
+        voice_client.source.volume = player.effective_volume
 
 
-def get_volume() -> int:
+def get_volume(ctx: commands.Context) -> int:
     """
-    Get the current volume level as a percentage (0-100).
+    Get the guild's current volume level as a percentage (0-100).
     
     Returns
     -------
     int
         Current volume level
     """
-    return int(_current_volume * 100)
+    return int(get_player(ctx).volume * 100)
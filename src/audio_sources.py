@@ -0,0 +1,353 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import discord
+
+try:
+    import numpy as np
+except ImportError:  # optional, see the "fast" extra
+    np = None
+
+# discord.py sends one frame every 20 ms
+FRAME_SECONDS = 0.02
+
+
+class FrameTiming:
+    """
+    Timing of the frames a guild's voice thread pulls, i.e. how regularly audio
+    is sent. discord.py asks for a frame every 20 ms; an interval of more than
+    `LATE_SECONDS` means a whole frame was late. Gaps of over a second are
+    pauses or track changes and are ignored.
+    """
+
+    LATE_SECONDS = 2 * FRAME_SECONDS
+    _PAUSE_SECONDS = 1.0
+
+    __slots__ = ("frames", "late_frames", "jitter_total", "max_interval", "_last")
+
+    def __init__(self):
+        self.frames = 0
+        self.late_frames = 0
+        # Sum of |interval - 20 ms|, for the mean jitter
+        self.jitter_total = 0.0
+        # Longest interval since the monitor last reset it
+        self.max_interval = 0.0
+        self._last: float | None = None
+
+    def record(self, now: float) -> None:
+        last = self._last
+        self._last = now
+        if last is None:
+            return
+        interval = now - last
+        if interval > self._PAUSE_SECONDS:
+            return
+        self.frames += 1
+        self.jitter_total += abs(interval - FRAME_SECONDS)
+        if interval > self.max_interval:
+            self.max_interval = interval
+        if interval > self.LATE_SECONDS:
+            self.late_frames += 1
+
+
+class TrackedSource(discord.AudioSource):
+    """
+    Wraps an audio source and counts the frames handed to the voice client.
+
+    `on_first_frame` runs (in the voice thread) with the `perf_counter` timestamp
+    of the first frame, `on_near_end` once fewer than `near_end_seconds` of the
+    track's `duration` are left. `start_offset` is where in the track the source
+    starts, for sources that were seeked into. Each frame is timed into `timing`.
+    """
+
+    def __init__(
+        self,
+        source: discord.AudioSource,
+        duration: Optional[float] = None,
+        near_end_seconds: float = 5.0,
+        on_near_end: Optional[Callable[[], None]] = None,
+        on_first_frame: Optional[Callable[[float], None]] = None,
+        start_offset: float = 0.0,
+        timing: Optional[FrameTiming] = None,
+    ):
+        self.original = source
+        self.frames = 0
+        self.start_offset = start_offset
+        self._timing = timing
+        self._near_end_frame = (
+            max(0, int((duration - start_offset - near_end_seconds) / FRAME_SECONDS))
+            if duration and on_near_end else None
+        )
+        self._on_near_end = on_near_end
+        self._on_first_frame = on_first_frame
+
+    @property
+    def position(self) -> float:
+        """Position in the track, in seconds of audio sent."""
+        return self.start_offset + self.frames * FRAME_SECONDS
+
+    @property
+    def volume(self) -> float:
+        return self.original.volume  # type: ignore[attr-defined]
+
+    @volume.setter
+    def volume(self, value: float) -> None:
+        self.original.volume = value  # type: ignore[attr-defined]
+
+    def read(self) -> bytes:
+        data = self.original.read()
+        if not data:
+            return data
+
+        self.frames += 1
+        if self._timing is not None:
+            self._timing.record(time.perf_counter())
+        if self.frames == 1 and self._on_first_frame:
+            self._on_first_frame(time.perf_counter())
+        if self._near_end_frame is not None and self.frames >= self._near_end_frame:
+            self._near_end_frame = None
+            self._on_near_end()  # type: ignore[misc]
+        return data
+
+    def is_opus(self) -> bool:
+        return self.original.is_opus()
+
+    def cleanup(self) -> None:
+        self.original.cleanup()
+
+
+class PreparedSource(discord.AudioSource):
+    """
+    Audio source whose first frames are read ahead of time.
+
+    `prebuffer` blocks until FFmpeg has connected and produced `frames` frames, so
+    it has to run off the event loop. Once it has, playback starts from memory and
+    the first 20 ms frame is available immediately.
+    """
+
+    def __init__(self, source: discord.AudioSource):
+        self.original = source
+        self._buffered: deque[bytes] = deque()
+        self.ready = threading.Event()
+
+    def prebuffer(self, frames: int) -> None:
+        try:
+            for _ in range(frames):
+                data = self.original.read()
+                if not data:
+                    break
+                self._buffered.append(data)
+        finally:
+            self.ready.set()
+
+    def read(self) -> bytes:
+        if self._buffered:
+            return self._buffered.popleft()
+        return self.original.read()
+
+    def is_opus(self) -> bool:
+        return self.original.is_opus()
+
+    def cleanup(self) -> None:
+        self._buffered.clear()
+        self.original.cleanup()
+
+
+class BufferedAudioSource(discord.AudioSource):
+    """
+    Reads up to `frames` frames ahead of playback on a separate thread, so a slow
+    or stalling FFmpeg pipe only becomes audible once the read-ahead is used up.
+
+    For FFmpeg PCM sources the reader fills a ring of preallocated frame buffers
+    straight from FFmpeg's stdout with `readinto`; other sources (e.g. Opus packets
+    of varying size) are buffered as returned by their `read`. `underruns` counts
+    the reads that found the buffer empty mid-track and `underrun_seconds` the time
+    the voice thread spent waiting for them.
+    """
+
+    def __init__(
+        self,
+        source: discord.AudioSource,
+        frames: int = 50,
+        on_cleanup: Optional[Callable[["BufferedAudioSource"], None]] = None,
+    ):
+        self.original = source
+        self.capacity = max(1, frames)
+        self._on_cleanup = on_cleanup
+        self._pipe = getattr(source, "_stdout", None) if isinstance(source, discord.FFmpegPCMAudio) else None
+        frame_size = discord.opus.Encoder.FRAME_SIZE
+        self._slots: list[bytearray] | None = (
+            [bytearray(frame_size) for _ in range(self.capacity)] if self._pipe is not None else None
+        )
+        self._packets: deque[bytes] = deque()
+
+        # Ring state: `_head` is the next slot to play, `_count` the filled slots
+        self._head = 0
+        self._count = 0
+        self._eof = False
+        self._closed = False
+        self._condition = threading.Condition()
+
+        self.frames_played = 0
+        self.underruns = 0
+        self.underrun_seconds = 0.0
+
+        self._reader = threading.Thread(target=self._read_loop, name="audio-read-ahead", daemon=True)
+        self._reader.start()
+
+    def _read_frame_into(self, view: memoryview) -> bool:
+        filled = 0
+        while filled < len(view):
+            n = self._pipe.readinto(view[filled:])  # type: ignore[union-attr]
+            if not n:
+                return False
+            filled += n
+        return True
+
+    def _read_loop(self) -> None:
+        condition = self._condition
+        try:
+            while True:
+                with condition:
+                    while self._count >= self.capacity and not self._closed:
+                        condition.wait()
+                    if self._closed:
+                        return
+                    tail = (self._head + self._count) % self.capacity
+
+                # Read outside the lock; the consumer never touches slots that aren't filled yet
+                if self._slots is not None:
+                    ok = self._read_frame_into(memoryview(self._slots[tail]))
+                else:
+                    packet = self.original.read()
+                    ok = bool(packet)
+                    if ok:
+                        self._packets.append(packet)
+                if not ok:
+                    return
+
+                with condition:
+                    self._count += 1
+                    condition.notify_all()
+        except (OSError, ValueError):
+            # The pipe was closed under us by cleanup()
+            pass
+        finally:
+            with condition:
+                self._eof = True
+                condition.notify_all()
+
+    def read(self) -> bytes:
+        condition = self._condition
+        with condition:
+            if self._count == 0 and not self._eof:
+                started = time.perf_counter()
+                while self._count == 0 and not self._eof and not self._closed:
+                    condition.wait()
+                # Waiting for the very first frame is start-up latency, not a stutter
+                if self.frames_played:
+                    self.underruns += 1
+                    self.underrun_seconds += time.perf_counter() - started
+            if self._count == 0:
+                return b""
+
+            if self._slots is not None:
+                data = bytes(self._slots[self._head])
+                self._head = (self._head + 1) % self.capacity
+            else:
+                data = self._packets.popleft()
+            self._count -= 1
+            condition.notify_all()
+        self.frames_played += 1
+        return data
+
+    @property
+    def buffered_frames(self) -> int:
+        return self._count
+
+    def is_opus(self) -> bool:
+        return self.original.is_opus()
+
+    def cleanup(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        # Killing FFmpeg unblocks a reader stuck in the pipe
+        self.original.cleanup()
+        self._reader.join(timeout=1)
+        if self._on_cleanup is not None:
+            self._on_cleanup(self)
+
+
+class GainSource(discord.AudioSource):
+    """
+    Volume stage for 16-bit stereo PCM, a vectorized replacement for
+    `discord.PCMVolumeTransformer` (requires NumPy, check `GainSource.available`).
+
+    Frames at unity gain are passed through untouched. Otherwise each frame is
+    scaled into buffers that are allocated once per source (and clipped to the
+    int16 range when amplifying). A volume change is applied as a linear ramp across the next frame
+    instead of a sudden step, which would be audible as a click.
+    """
+
+    available = np is not None
+
+    def __init__(self, source: discord.AudioSource, volume: float = 1.0):
+        if source.is_opus():
+            raise discord.ClientException("AudioSource must not be Opus encoded.")
+        self.original = source
+        self._target = max(0.0, float(volume))
+        self._gain = self._target
+
+        samples = discord.opus.Encoder.FRAME_SIZE // 2
+        self._work = np.empty(samples, dtype=np.float32)
+        self._out = np.empty(samples, dtype=np.int16)
+        # Per-sample gain across one frame; both channels of a stereo sample share a step
+        self._steps = np.repeat(np.linspace(1.0 / (samples // 2), 1.0, samples // 2, dtype=np.float32), 2)
+        self._ramp = np.empty(samples, dtype=np.float32)
+
+    @property
+    def volume(self) -> float:
+        return self._target
+
+    @volume.setter
+    def volume(self, value: float) -> None:
+        self._target = max(0.0, float(value))
+
+    def read(self) -> bytes:
+        data = self.original.read()
+        target = self._target
+        gain = self._gain
+        if not data or (gain == 1.0 and target == 1.0):
+            return data
+
+        samples = np.frombuffer(data, dtype=np.int16)
+        if len(samples) != len(self._work):
+            # Not a regular frame (shouldn't happen with FFmpeg PCM); scale it the slow way
+            work = samples * np.float32(target)
+            self._gain = target
+            return np.clip(work, -32768, 32767).astype(np.int16).tobytes()
+
+        work = self._work
+        if gain != target:
+            np.multiply(self._steps, target - gain, out=self._ramp)
+            self._ramp += gain
+            np.multiply(samples, self._ramp, out=work)
+            self._gain = target
+        else:
+            np.multiply(samples, np.float32(gain), out=work)
+        if max(gain, target) > 1.0:
+            # Only amplification can leave the int16 range
+            np.clip(work, -32768, 32767, out=work)
+        np.copyto(self._out, work, casting="unsafe")
+        return self._out.tobytes()
+
+    def is_opus(self) -> bool:
+        return False
+
+    def cleanup(self) -> None:
+        self.original.cleanup()
@@ -1,51 +1,176 @@
+import asyncio
+
 import discord
 from discord.ext import commands
 
+from audio_manager import configure_gapless, configure_playback, init_audio_cache
 from command_handler import CommandHandler
 from settings import Settings, BotConfig
 from exceptions import get_random_human_error_title
+from player import players
+from supervisor import Supervisor
+from voice_manager import voice_connections
+from extraction_executor import extraction_executor
+from health import health_monitor
+from loudness import loudness_analyzer
+from youtube import (
+    configure_extraction,
+    configure_playlists,
+    configure_speculation,
+    init_metadata_store,
+    init_pools,
+    metadata_cache,
+    search_cache,
+)
 
-# Load settings (reads .env then config.yml)
-settings = Settings()
-bot_config = BotConfig.from_file(settings.BOT_CONFIGS_PATH)
 
-if not discord.opus.is_loaded():
-    discord.opus.load_opus(settings.OPUS_LIB_NAME)
-assert discord.opus.is_loaded(), "Opus failed to load!"
+def configure_components(settings: Settings) -> None:
+    """Apply the settings to the module-level caches, pools and players."""
+    metadata_cache.configure(
+        max_entries=settings.METADATA_CACHE_SIZE,
+        metadata_ttl=settings.METADATA_CACHE_TTL,
+        expiry_margin=settings.STREAM_URL_EXPIRY_MARGIN,
+        refresh_ahead=settings.STREAM_URL_REFRESH_AHEAD,
+    )
+    search_cache.configure(max_entries=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL)
+    configure_extraction(settings.EXTRACTION_WORKERS, settings.EXTRACTION_QUEUE_SIZE, settings.EXTRACTION_BACKEND)
+    players.configure(
+        idle_timeout=settings.PLAYER_IDLE_TIMEOUT,
+        default_volume=settings.DEFAULT_VOLUME / 100,
+        depth=settings.PREFETCH_DEPTH,
+        concurrency=settings.PREFETCH_CONCURRENCY,
+        refresh_margin=settings.PREFETCH_REFRESH_MARGIN,
+    )
+    voice_connections.configure(
+        idle_timeout=settings.VOICE_IDLE_TIMEOUT,
+        connect_timeout=settings.VOICE_CONNECT_TIMEOUT,
+        resume_wait=settings.VOICE_RESUME_WAIT,
+    )
+    configure_playback(settings.PLAYBACK_MODE, settings.READ_AHEAD_FRAMES, settings.STREAM_RESUME_ATTEMPTS)
+    configure_playlists(settings.PLAYLIST_MAX_ENTRIES)
+    configure_speculation(settings.SEARCH_SPECULATIVE_RESULTS)
+    configure_gapless(
+        enabled=settings.GAPLESS_PLAYBACK,
+        preroll_seconds=settings.GAPLESS_PREROLL_SECONDS,
+        prebuffer_frames=settings.GAPLESS_PREBUFFER_FRAMES,
+    )
+    health_monitor.configure(
+        enabled=settings.HEALTH_MONITOR,
+        report_interval=settings.HEALTH_REPORT_INTERVAL,
+        slow_callback_seconds=settings.SLOW_CALLBACK_SECONDS,
+    )
+    loudness_analyzer.configure(
+        enabled=settings.LOUDNESS_NORMALIZATION,
+        target_lufs=settings.LOUDNESS_TARGET_LUFS,
+        max_boost_db=settings.LOUDNESS_MAX_BOOST_DB,
+    )
+    if settings.METADATA_STORE_PATH is not None:
+        init_metadata_store(settings.METADATA_STORE_PATH, settings.METADATA_STORE_MAX_ENTRIES)
+    if settings.AUDIO_CACHE_DIR is not None:
+        init_audio_cache(
+            settings.AUDIO_CACHE_DIR,
+            max_bytes=settings.AUDIO_CACHE_MAX_MB * 1024 * 1024,
+            min_plays=settings.AUDIO_CACHE_MIN_PLAYS,
+            max_track_seconds=settings.AUDIO_CACHE_MAX_TRACK_SECONDS,
+        )
 
-# Intents
-intents = discord.Intents.default()
-intents.message_content = True
+    if not discord.opus.is_loaded():
+        discord.opus.load_opus(settings.OPUS_LIB_NAME)
+    assert discord.opus.is_loaded(), "Opus failed to load!"
 
-# Bot setup
-bot = commands.Bot(
-    command_prefix=bot_config.prefix,
-    intents=intents,
-    description="Minimal music-bot MVP"
-)
 
-@bot.event
-async def on_ready():
-    print(f"[+] Logged in as {bot.user} (ID: {bot.user.id})")
-    print("Registered commands:", [c.name for c in bot.commands])
-
-@bot.event
-async def on_command_error(ctx: commands.Context, error: commands.CommandError):
-    """Handle command errors."""
-    if isinstance(error, commands.CommandNotFound):
-        embed = discord.Embed(
-            title=get_random_human_error_title(),
-            description=f"Command `{ctx.invoked_with}` not found. Use `{bot_config.prefix}help` to see available commands.",
-            color=discord.Color.red(),
+def create_bot(
+    settings: Settings,
+    bot_config: BotConfig,
+    shard_ids: list[int] | None = None,
+    shard_count: int | None = None,
+) -> commands.Bot:
+    """
+    Create the bot with its event handlers and commands registered. With a
+    `shard_count` it is an `AutoShardedBot` running `shard_ids` (default: all shards).
+    """
+    # Intents
+    intents = discord.Intents.default()
+    intents.message_content = True
+
+    # Bot setup
+    if shard_count is None:
+        bot = commands.Bot(
+            command_prefix=bot_config.prefix,
+            intents=intents,
+            description="Minimal music-bot MVP"
+        )
+    else:
+        bot = commands.AutoShardedBot(
+            command_prefix=bot_config.prefix,
+            intents=intents,
+            description="Minimal music-bot MVP",
+            shard_count=shard_count,
+            shard_ids=shard_ids,
         )
-        await ctx.send(embed=embed)
+
+    @bot.event
+    async def setup_hook():
+        # Build the YoutubeDL pools (or worker processes) before the first command needs them
+        if settings.EXTRACTION_BACKEND == "process":
+            extraction_executor.prestart()
+        else:
+            await asyncio.to_thread(init_pools, settings.YTDL_POOL_SIZE)
+        players.start()
+        voice_connections.start()
+        health_monitor.start()
+
+    @bot.event
+    async def on_ready():
+        print(f"[+] Logged in as {bot.user} (ID: {bot.user.id})")
+        if bot.shard_count is not None:
+            print(f"Shards: {getattr(bot, 'shard_ids', None) or list(range(bot.shard_count))} of {bot.shard_count}")
+        print("Registered commands:", [c.name for c in bot.commands])
+
+    @bot.event
+    async def on_command_error(ctx: commands.Context, error: commands.CommandError):
+        """Handle command errors."""
+        if isinstance(error, commands.CommandNotFound):
+            embed = discord.Embed(
+                title=get_random_human_error_title(),
+                description=f"Command `{ctx.invoked_with}` not found. Use `{bot_config.prefix}help` to see available commands.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+        else:
+            # Re-raise other errors so they get logged
+            raise error
+
+    # Load commands via handler
+    cmd_handler = CommandHandler(bot)
+    cmd_handler.load_commands()
+    return bot
+
+
+def run_bot(shard_ids: list[int] | None = None, shard_count: int | None = None) -> None:
+    """Run one bot process, optionally for a subset of the shards."""
+    # Load settings (reads .env then config.yml)
+    settings = Settings()
+    bot_config = BotConfig.from_file(settings.BOT_CONFIGS_PATH)
+
+    configure_components(settings)
+    bot = create_bot(settings, bot_config, shard_ids=shard_ids, shard_count=shard_count)
+    # Log through the root logger, so our modules' INFO records (e.g. the periodic
+    # health report) are shown too, not only discord.py's own
+    bot.run(settings.DISCORD_TOKEN.get_secret_value(), root_logger=True)
+
+
+def main() -> None:
+    settings = Settings()
+    if settings.SHARD_WORKERS > 1:
+        # Several processes, each running a share of the shards
+        discord.utils.setup_logging()
+        shard_count = settings.SHARD_COUNT or settings.SHARD_WORKERS
+        Supervisor(shard_count, settings.SHARD_WORKERS).run()
     else:
-        # Re-raise other errors so they get logged
-        raise error
+        run_bot(shard_count=settings.SHARD_COUNT)
 
-# Load commands via handler
-cmd_handler = CommandHandler(bot)
-cmd_handler.load_commands()
 
+# Extraction worker processes import this module again, so nothing may run on import
 if __name__ == "__main__":
-    bot.run(settings.DISCORD_TOKEN.get_secret_value())
+    main()
@@ -1,17 +1,101 @@
 import discord
 from discord.ext import commands
 
-from audio_manager import play_url, pause_playback, resume_playback, stop_playback, play_next_in_queue, set_volume, get_volume
-from youtube import YouTubeMetadata, extract_info, search_youtube
-from music_queue import music_queue
-from utils import parse_query_and_args
+from audio_manager import (
+    play_url, pause_playback, resume_playback, stop_playback, set_volume, get_volume,
+    seek as seek_playback, get_position,
+)
+from youtube import YouTubeMetadata, extract_info, iter_playlist, parse_playlist_id, resolve_query
+from player import get_player
+from utils import parse_query_and_args, parse_timestamp
 
 from exceptions import HumanError, PlaybackError, get_random_human_error_title
 
 
 
+def _now_playing_embed(meta: YouTubeMetadata) -> discord.Embed:
+    minutes, seconds = divmod(meta.duration, 60)
+    embed = discord.Embed(
+        title="Now Playing",
+        description=f"**{meta.title}**\nDuration: {minutes}:{seconds:02d}",
+        color=discord.Color.green(),
+    )
+    embed.set_thumbnail(url=meta.thumbnail)
+    embed.add_field(name="URL", value=f"[Watch on YouTube]({meta.webpage_url})", inline=False)
+    return embed
+
+
+async def play_playlist(ctx: commands.Context, url: str):
+    """
+    Queue a playlist entry by entry while it is being listed. The first entry starts
+    playing right away if nothing is playing; the others are only resolved once the
+    prefetcher reaches them.
+    """
+    player = get_player(ctx)
+    music_queue = player.queue
+    # Stop adding songs if the queue gets cleared (e.g. `!stop`) while we are listing
+    clear_count = music_queue.clear_count
+
+    status_message = await ctx.send(embed=discord.Embed(
+        title="Loading Playlist",
+        description="Adding songs to the queue...",
+        color=discord.Color.yellow(),
+    ))
+
+    added = 0
+    skipped = 0
+    try:
+        async for entry in iter_playlist(url):
+            if music_queue.clear_count != clear_count:
+                break
+
+            voice_client: discord.VoiceClient | None = ctx.guild.voice_client  # type: ignore[attr-defined]
+            if added == 0 and not (voice_client and (voice_client.is_playing() or voice_client.is_paused())):
+                try:
+                    meta = await player.prefetcher.ensure_fresh(entry)
+                except Exception:
+                    # e.g. a private or deleted video; start with the next entry instead
+                    skipped += 1
+                    continue
+                music_queue.set_current(meta)
+
+                await play_url(
+                    ctx, meta.stream_url,
+                    duration=meta.duration, codec=meta.codec, video_id=meta.video_id, loudness=meta.loudness,
+                )
+                await ctx.send(embed=_now_playing_embed(meta))
+            else:
+                music_queue.add(entry)
+            added += 1
+    except Exception as exc:
+        await status_message.edit(embed=discord.Embed(
+            title="Playlist Error",
+            description=f"Failed to load the playlist after {added} songs: {exc}",
+            color=discord.Color.red(),
+        ))
+        return
+
+    if added == 0:
+        embed = discord.Embed(
+            title="No Results",
+            description="The playlist is empty or unavailable.",
+            color=discord.Color.red(),
+        )
+    else:
+        description = f"Added {added} songs from the playlist.\nQueue length: {music_queue.size()}"
+        if skipped:
+            description += f"\nSkipped {skipped} unavailable songs."
+        embed = discord.Embed(
+            title="Playlist Added",
+            description=description,
+            color=discord.Color.blue(),
+        )
+    await status_message.edit(embed=embed)
+
+
 async def play(ctx: commands.Context, *args):
     """Stream audio from a YouTube URL or search query into the caller's voice channel."""
+    music_queue = get_player(ctx).queue
     try:
         if not args:
             raise HumanError("Please provide a YouTube URL or search query. Usage: `!play <url or search terms>`")
@@ -46,13 +130,17 @@ async def play(ctx: commands.Context, *args):
         await ctx.send(embed=embed)
         return
 
+    if parse_playlist_id(query) is not None:
+        await play_playlist(ctx, query)
+        return
+
     # Check if it's a URL (contains youtube.com, youtu.be, etc.)
     is_url = any(domain in query.lower() for domain in ["youtube.com", "youtu.be", "music.youtube.com"])
 
     # Retrieve metadata (this can take a moment)
     try:
         if is_url:
-            meta: YouTubeMetadata = await extract_info(query)
+            meta: YouTubeMetadata = await extract_info(query, guild_id=ctx.guild.id)
         else:
             # Search for the best match
             searching_embed = discord.Embed(
@@ -62,10 +150,11 @@ async def play(ctx: commands.Context, *args):
             )
             search_message = await ctx.send(embed=searching_embed)
 
-            search_results = await search_youtube(query, limit=1)
+            # Search and extract the best match in a single resolve step
+            best_match = await resolve_query(query, guild_id=ctx.guild.id)
             await search_message.delete()
 
-            if not search_results:
+            if best_match is None:
                 embed = discord.Embed(
                     title="No Results",
                     description=f"No search results found for: {query}",
@@ -74,9 +163,7 @@ async def play(ctx: commands.Context, *args):
                 await ctx.send(embed=embed)
                 return
 
-            # Get full metadata including stream_url for the best match
-            best_match = search_results[0]
-            meta: YouTubeMetadata = await extract_info(best_match.webpage_url)
+            meta: YouTubeMetadata = best_match
 
     except Exception as exc:  # pragma: no cover
         embed = discord.Embed(
@@ -108,12 +195,11 @@ async def play(ctx: commands.Context, *args):
         # Play immediately
         music_queue.set_current(meta)
         
-        # Create callback for automatic queue progression
-        async def queue_callback():
-            await play_next_in_queue(ctx)
-        
         try:
-            await play_url(ctx, meta.stream_url, on_complete=queue_callback)
+            await play_url(
+                ctx, meta.stream_url,
+                duration=meta.duration, codec=meta.codec, video_id=meta.video_id, loudness=meta.loudness,
+            )
         except PlaybackError as exc:
             embed = discord.Embed(
                 title="Playback Error",
@@ -124,15 +210,7 @@ async def play(ctx: commands.Context, *args):
             return
 
         # Success – send now-playing embed
-        minutes, seconds = divmod(meta.duration, 60)
-        embed = discord.Embed(
-            title="Now Playing",
-            description=f"**{meta.title}**\nDuration: {minutes}:{seconds:02d}",
-            color=discord.Color.green(),
-        )
-        embed.set_thumbnail(url=meta.thumbnail)
-        embed.add_field(name="URL", value=f"[Watch on YouTube]({meta.webpage_url})", inline=False)
-        await ctx.send(embed=embed)
+        await ctx.send(embed=_now_playing_embed(meta))
 
 
 async def stop(ctx: commands.Context):
@@ -192,12 +270,53 @@ async def resume(ctx: commands.Context):
         await ctx.send(embed=embed)
 
 
+async def seek(ctx: commands.Context, position: str = None):
+    """Jump to a position in the current track (e.g. 1:30, +15 or -10)."""
+    try:
+        if position is None:
+            raise HumanError("Please provide a position. Usage: `!seek <m:ss>`, `!seek +15` or `!seek -10`")
+
+        try:
+            if position[0] in "+-":
+                current = get_position(ctx) or 0.0
+                offset = parse_timestamp(position[1:])
+                target = max(0.0, current + offset if position[0] == "+" else current - offset)
+            else:
+                target = parse_timestamp(position)
+        except ValueError:
+            raise HumanError("Please provide the position as seconds or `m:ss`, optionally with `+`/`-`.")
+
+        await seek_playback(ctx, target)
+
+        minutes, seconds = divmod(int(target), 60)
+        embed = discord.Embed(
+            title="Seeked",
+            description=f"Continuing at {minutes}:{seconds:02d}",
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+    except HumanError as exc:
+        embed = discord.Embed(
+            title=get_random_human_error_title(),
+            description=str(exc),
+            color=discord.Color.red(),
+        )
+        await ctx.send(embed=embed)
+    except PlaybackError as exc:
+        embed = discord.Embed(
+            title="Playback Error",
+            description=str(exc),
+            color=discord.Color.red(),
+        )
+        await ctx.send(embed=embed)
+
+
 async def volume(ctx: commands.Context, level: int = None):
     """Set the playback volume (0-100)."""
     try:
         if level is None:
             # Show current volume
-            current_vol = get_volume()
+            current_vol = get_volume(ctx)
             embed = discord.Embed(
                 title="Current Volume",
                 description=f"Volume is set to {current_vol}%",
@@ -232,4 +351,5 @@ def setup(bot: commands.Bot):
     bot.add_command(commands.Command(stop, name="stop", aliases=["stopp", "x"], help="Stop playback and clear the queue"))
     bot.add_command(commands.Command(pause, name="pause", help="Pause playback"))
     bot.add_command(commands.Command(resume, name="resume", aliases=["unpause"], help="Resume playback"))
+    bot.add_command(commands.Command(seek, name="seek", aliases=["jumpto"], help="Jump to a position in the current track"))
     bot.add_command(commands.Command(volume, name="volume", aliases=["vol", "v"], help="Set playback volume (0-100)"))
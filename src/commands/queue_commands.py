@@ -1,15 +1,18 @@
 import discord
 from discord.ext import commands
 
-from music_queue import music_queue
-from audio_manager import play_next_in_queue
+from player import get_player
+from audio_manager import get_position, skip_tracks
 from exceptions import HumanError, get_random_human_error_title
 
 
 async def queue(ctx: commands.Context):
     """Show the current playback queue."""
+    music_queue = get_player(ctx).queue
     current_song = music_queue.get_current()
-    queue_list = music_queue.get_queue()
+    queue_size = music_queue.size()
+    # Only the first 10 songs are shown, don't copy the whole queue
+    queue_list = music_queue.peek(10)
     
     if not current_song and music_queue.is_empty():
         embed = discord.Embed(
@@ -37,15 +40,15 @@ async def queue(ctx: commands.Context):
     # Show queue
     if queue_list:
         queue_text = ""
-        for i, song in enumerate(queue_list[:10], 1):  # Show first 10 songs
+        for i, song in enumerate(queue_list, 1):  # Show first 10 songs
             minutes, seconds = divmod(song.duration, 60)
             queue_text += f"{i}. **{song.title}** ({minutes}:{seconds:02d})\n"
         
-        if len(queue_list) > 10:
-            queue_text += f"... and {len(queue_list) - 10} more songs"
+        if queue_size > 10:
+            queue_text += f"... and {queue_size - 10} more songs"
         
         embed.add_field(
-            name=f"📋 Up Next ({len(queue_list)} songs)",
+            name=f"📋 Up Next ({queue_size} songs)",
             value=queue_text,
             inline=False
         )
@@ -61,6 +64,7 @@ async def queue(ctx: commands.Context):
 
 async def now_playing(ctx: commands.Context):
     """Show the currently playing track."""
+    music_queue = get_player(ctx).queue
     current_song = music_queue.get_current()
     
     if not current_song:
@@ -73,9 +77,14 @@ async def now_playing(ctx: commands.Context):
         return
     
     minutes, seconds = divmod(current_song.duration, 60)
+    duration = f"{minutes}:{seconds:02d}"
+    position = get_position(ctx)
+    if position is not None:
+        minutes, seconds = divmod(int(position), 60)
+        duration = f"{minutes}:{seconds:02d} / {duration}"
     embed = discord.Embed(
         title="Now Playing",
-        description=f"**{current_song.title}**\nDuration: {minutes}:{seconds:02d}",
+        description=f"**{current_song.title}**\nDuration: {duration}",
         color=discord.Color.green(),
     )
     embed.set_thumbnail(url=current_song.thumbnail)
@@ -91,6 +100,7 @@ async def now_playing(ctx: commands.Context):
 
 async def clear_queue(ctx: commands.Context):
     """Clear the current playback queue."""
+    music_queue = get_player(ctx).queue
     if music_queue.is_empty():
         embed = discord.Embed(
             title="Queue Already Empty",
@@ -113,6 +123,7 @@ async def clear_queue(ctx: commands.Context):
 
 async def skip(ctx: commands.Context):
     """Skip the current track."""
+    music_queue = get_player(ctx).queue
     current_song = music_queue.get_current()
     
     if not current_song:
@@ -124,13 +135,8 @@ async def skip(ctx: commands.Context):
         await ctx.send(embed=embed)
         return
     
-    # Stop current playback
-    voice_client: discord.VoiceClient | None = ctx.guild.voice_client  # type: ignore[attr-defined]
-    if voice_client and (voice_client.is_playing() or voice_client.is_paused()):
-        voice_client.stop()
-    
-    # Try to play next song
-    if await play_next_in_queue(ctx):
+    # Stop current playback and try to play the next song
+    if await skip_tracks(ctx):
         next_song = music_queue.get_current()
         embed = discord.Embed(
             title="Skipped",
@@ -149,6 +155,7 @@ async def skip(ctx: commands.Context):
 
 async def skip_n(ctx: commands.Context, n: int = None):
     """Skip the next N tracks in the queue."""
+    music_queue = get_player(ctx).queue
     try:
         if n is None:
             raise HumanError("Please provide a number. Usage: `!skip_n <number>`")
@@ -176,40 +183,14 @@ async def skip_n(ctx: commands.Context, n: int = None):
         await ctx.send(embed=embed)
         return
     
-    current_song = music_queue.get_current()
-    
-    # Stop current playback
-    voice_client: discord.VoiceClient | None = ctx.guild.voice_client  # type: ignore[attr-defined]
-    if voice_client and (voice_client.is_playing() or voice_client.is_paused()):
-        voice_client.stop()
-    
-    # Skip to the nth song
-    target_song = music_queue.skip_n(n)
-    
-    if target_song:
-        music_queue.set_current(target_song)
-        
-        # Create callback for automatic queue progression
-        async def queue_callback():
-            await play_next_in_queue(ctx)
-        
-        try:
-            from audio_manager import play_url
-            await play_url(ctx, target_song.stream_url, on_complete=queue_callback)
-            
-            embed = discord.Embed(
-                title=f"Skipped to Position {n}",
-                description=f"Now playing: **{target_song.title}**",
-                color=discord.Color.green(),
-            )
-        except Exception as exc:
-            embed = discord.Embed(
-                title="Playback Error",
-                description=f"Failed to play skipped song: {exc}",
-                color=discord.Color.red(),
-            )
+    # Stop current playback and skip to the nth song
+    if await skip_tracks(ctx, n):
+        embed = discord.Embed(
+            title=f"Skipped to Position {n}",
+            description=f"Now playing: **{music_queue.get_current().title}**",
+            color=discord.Color.green(),
+        )
     else:
-        music_queue.set_current(None)
         embed = discord.Embed(
             title="Queue Empty",
             description="Skipped songs but queue is now empty.",
@@ -221,6 +202,7 @@ async def skip_n(ctx: commands.Context, n: int = None):
 
 async def remove_n(ctx: commands.Context, n: int = None):
     """Remove the Nth track from the queue."""
+    music_queue = get_player(ctx).queue
     try:
         if n is None:
             raise HumanError("Please provide a number. Usage: `!remove_n <number>`")
@@ -259,6 +241,7 @@ async def remove_n(ctx: commands.Context, n: int = None):
 
 async def shuffle(ctx: commands.Context):
     """Shuffle the current playback queue."""
+    music_queue = get_player(ctx).queue
     if music_queue.is_empty():
         embed = discord.Embed(
             title="Queue Empty",
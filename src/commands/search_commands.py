@@ -2,8 +2,9 @@ import discord
 from discord.ext import commands
 
 from exceptions import HumanError, get_random_human_error_title
-from youtube import search_youtube
+from youtube import expedite, search_youtube, speculate
 from commands.control_commands import play
+from player import get_player
 from utils import parse_query_and_args
 
 
@@ -44,7 +45,7 @@ async def search(ctx: commands.Context, *args):
         
         # Perform search
         try:
-            results = await search_youtube(query, limit)
+            results = await search_youtube(query, limit, guild_id=ctx.guild.id)
         except Exception as exc:
             embed = discord.Embed(
                 title="Search Error",
@@ -85,6 +86,9 @@ async def search(ctx: commands.Context, *args):
         await search_message.edit(embed=embed)
         message = search_message
         
+        # Resolve the top results in the background while the user decides
+        speculative = speculate(results, guild_id=ctx.guild.id)
+
         # Add number reactions
         number_emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
         for i in range(len(results)):
@@ -104,6 +108,17 @@ async def search(ctx: commands.Context, *args):
             # Get the selected result index
             selected_index = number_emojis.index(str(reaction.emoji))
             selected_result = results[selected_index]
+
+            # Drop the other speculative work; let the selected one finish so playback
+            # below is served from the cache instead of starting a second extraction.
+            # If it is still waiting in line, it moves up to the priority `play` would
+            # use, so the pick never waits behind other guilds' background work.
+            for i, task in enumerate(speculative):
+                if i != selected_index:
+                    task.cancel()
+            if selected_index < len(speculative):
+                expedite(selected_result.webpage_url)
+                await speculative[selected_index]
             
             # Clear reactions after selection
             try:
@@ -111,8 +126,22 @@ async def search(ctx: commands.Context, *args):
             except:
                 pass  # Ignore permission errors
             
-            # Actually invoke the play command
-            await play(ctx, selected_result.webpage_url)
+            player = get_player(ctx)
+            if player.is_playing():
+                # The search result already has everything the queue needs; the stream
+                # URL is resolved by the prefetcher once the song comes up
+                player.queue.add(selected_result)
+                minutes, seconds = divmod(selected_result.duration, 60)
+                embed = discord.Embed(
+                    title="Added to Queue",
+                    description=f"**{selected_result.title}**\nDuration: {minutes}:{seconds:02d}\nPosition: {player.queue.size()}",
+                    color=discord.Color.blue(),
+                )
+                embed.set_thumbnail(url=selected_result.thumbnail)
+                await ctx.send(embed=embed)
+            else:
+                # Actually invoke the play command
+                await play(ctx, selected_result.webpage_url)
             
         except TimeoutError:
             # Remove reactions after timeout
@@ -120,6 +149,9 @@ async def search(ctx: commands.Context, *args):
                 await message.clear_reactions()
             except:
                 pass  # Ignore permission errors
+        finally:
+            for task in speculative:
+                task.cancel()
             
     except HumanError as exc:
         embed = discord.Embed(
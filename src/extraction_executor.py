@@ -0,0 +1,288 @@
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict, deque
+from enum import IntEnum
+from typing import Any, Callable, Deque, Hashable
+
+from exceptions import PlaybackError
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Scheduling class of an extraction job; lower values run first."""
+
+    NOW_PLAYING = 0     # a user is waiting for the result
+    PREFETCH = 1        # background look-ahead and stream URL refreshes
+    SPECULATIVE = 2     # results a user might pick; usually cancelled
+
+
+class _Job:
+    __slots__ = ("fn", "args", "key", "priority", "started", "enqueued_at")
+
+    def __init__(self, fn: Callable, args: tuple, key: Hashable, priority: Priority, started: asyncio.Future):
+        self.fn = fn
+        self.args = args
+        self.key = key
+        self.priority = priority
+        # Resolves to the running job's future once a worker picks it up
+        self.started = started
+        self.enqueued_at = time.monotonic()
+
+
+class ExtractionExecutor:
+    """
+    Dedicated worker pool for blocking yt-dlp calls with admission control.
+
+    At most `workers` jobs run at once; up to `max_pending` more wait in line and
+    anything beyond that is rejected with a `PlaybackError`. Background jobs are
+    already turned away once half of the line is taken, so they cannot crowd out
+    requests a user is waiting for. Waiting jobs are picked
+    by priority first, then round robin across guilds, so one guild queueing a lot
+    of work cannot starve the others. Timeouts only count the time a job actually
+    runs, not the time it spent waiting for a worker.
+
+    The workers are threads by default. With the "process" backend they are
+    long-lived worker processes instead, so CPU-heavy extraction does not compete
+    with the event loop and the voice threads for the GIL. Jobs then have to be
+    picklable module-level functions and should return small, plain results.
+
+    Playlist listings are the one kind of yt-dlp work that doesn't run here: they
+    stream entries for as long as the playlist is, so they get their own threads,
+    limited by `youtube.iter_playlist`.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 64):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.backend = "thread"
+        self._initializer: Callable[..., None] | None = None
+        self._initargs: tuple = ()
+        self._preload: tuple[str, ...] = ()
+        self._executor: concurrent.futures.Executor | None = None
+        # priority -> guild -> waiting jobs; guilds rotate to the back after each pick
+        self._waiting: dict[Priority, OrderedDict[Hashable, Deque[_Job]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._pending = 0
+        self._running = 0
+
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.max_depth = 0
+        self._wait_samples: dict[Priority, Deque[float]] = {priority: deque(maxlen=500) for priority in Priority}
+
+    def configure(
+        self,
+        workers: int,
+        max_pending: int,
+        backend: str = "thread",
+        initializer: Callable[..., None] | None = None,
+        initargs: tuple = (),
+        preload: tuple[str, ...] = (),
+    ) -> None:
+        """
+        Parameters
+        ----------
+        backend
+            "thread" or "process".
+        initializer, initargs
+            Run once in every worker process (process backend only).
+        preload
+            Modules imported once by the fork server, so new worker processes
+            start with them already loaded (process backend only).
+        """
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Unknown extraction backend: {backend!r}")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.backend = backend
+        self._initializer = initializer
+        self._initargs = initargs
+        self._preload = preload
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.backend == "process":
+                # Fork workers from a clean server process rather than from the bot,
+                # whose threads would otherwise be copied into every worker
+                if "forkserver" in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context("forkserver")
+                    context.set_forkserver_preload(list(self._preload))
+                else:
+                    context = multiprocessing.get_context("spawn")
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=max(1, self.workers),
+                    mp_context=context,
+                    initializer=self._initializer,
+                    initargs=self._initargs,
+                )
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(1, self.workers), thread_name_prefix="ytdl"
+                )
+        return self._executor
+
+    def prestart(self) -> None:
+        """Start all worker processes now instead of on the first jobs."""
+        if self.backend != "process":
+            return
+        executor = self._get_executor()
+        # Each submission that finds no idle worker starts a new process
+        for _ in range(max(1, self.workers)):
+            executor.submit(int)
+        logger.info("Starting %d extraction worker process(es)", self.workers)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        guild_id: Hashable = None,
+        priority: Priority = Priority.NOW_PLAYING,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Run `fn(*args)` on a worker and return its result.
+
+        Raises
+        ------
+        PlaybackError
+            If too many jobs are already waiting.
+        asyncio.TimeoutError
+            If the job runs longer than `timeout` seconds.
+        """
+        limit = self.max_pending if priority == Priority.NOW_PLAYING else self.max_pending // 2
+        if self._pending >= limit:
+            self.rejected += 1
+            raise PlaybackError("The bot is busy fetching other songs right now, please try again in a moment.")
+
+        loop = asyncio.get_running_loop()
+        job = _Job(fn, args, guild_id, priority, loop.create_future())
+        self._waiting[priority].setdefault(guild_id, deque()).append(job)
+        self._pending += 1
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self._pending)
+        self._dispatch()
+
+        try:
+            running = await job.started
+        except asyncio.CancelledError:
+            self._withdraw(job)
+            raise
+        return await asyncio.wait_for(running, timeout)
+
+    def _withdraw(self, job: _Job) -> None:
+        jobs = self._waiting[job.priority].get(job.key)
+        if jobs is not None and job in jobs:
+            jobs.remove(job)
+            if not jobs:
+                del self._waiting[job.priority][job.key]
+            self._pending -= 1
+
+    def promote(self, fn: Callable[..., Any], *args: Any, priority: Priority = Priority.NOW_PLAYING) -> bool:
+        """
+        Move a waiting `fn(*args)` job of a lower priority class up to `priority`,
+        e.g. once a user picked the result it was speculating on.
+        Returns False if no such job is waiting (it is running, done or was never queued).
+        """
+        for lower in Priority:
+            if lower <= priority:
+                continue
+            for key, jobs in self._waiting[lower].items():
+                for job in jobs:
+                    if job.fn is fn and job.args == args:
+                        self._withdraw(job)
+                        job.priority = priority
+                        self._waiting[priority].setdefault(key, deque()).append(job)
+                        self._pending += 1
+                        return True
+        return False
+
+    def _next_job(self) -> _Job | None:
+        for priority in Priority:
+            guilds = self._waiting[priority]
+            if guilds:
+                key, jobs = next(iter(guilds.items()))
+                job = jobs.popleft()
+                if jobs:
+                    guilds.move_to_end(key)
+                else:
+                    del guilds[key]
+                self._pending -= 1
+                return job
+        return None
+
+    def _dispatch(self) -> None:
+        while self._running < self.workers:
+            job = self._next_job()
+            if job is None:
+                return
+            if job.started.done():
+                continue
+            self._wait_samples[job.priority].append(time.monotonic() - job.enqueued_at)
+            try:
+                future = self._submit(job)
+            except Exception as exc:
+                job.started.set_exception(exc)
+                continue
+            self._running += 1
+            loop = job.started.get_loop()
+            future.add_done_callback(lambda _, loop=loop: self._notify_done(loop))
+            job.started.set_result(asyncio.wrap_future(future, loop=loop))
+
+    def _submit(self, job: _Job) -> concurrent.futures.Future:
+        try:
+            return self._get_executor().submit(job.fn, *job.args)
+        except concurrent.futures.BrokenExecutor:
+            # A worker process died and took the pool down; start a fresh one
+            logger.warning("Extraction worker pool broke, restarting it")
+            self._executor = None
+            return self._get_executor().submit(job.fn, *job.args)
+
+    def _notify_done(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Runs on a worker or executor management thread
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self._on_done)
+
+    def _on_done(self) -> None:
+        self._running -= 1
+        self.completed += 1
+        self._dispatch()
+
+    def stats(self) -> dict[str, Any]:
+        waits: dict[str, dict[str, float]] = {}
+        for priority, samples in self._wait_samples.items():
+            if samples:
+                ordered = sorted(samples)
+                waits[priority.name.lower()] = {
+                    "avg": sum(ordered) / len(ordered),
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    "max": ordered[-1],
+                }
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "running": self._running,
+            "queue_depth": self._pending,
+            "max_queue_depth": self.max_depth,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "wait_seconds": waits,
+        }
+
+
+# Global executor shared by all yt-dlp work
+extraction_executor = ExtractionExecutor()
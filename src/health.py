@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any
+
+import audio_manager
+from extraction_executor import extraction_executor
+from loudness import loudness_analyzer
+from player import players
+from voice_manager import voice_connections
+from youtube import lookups, metadata_cache, search_cache
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Watches for the two causes of stuttering playback: a blocked event loop and
+    a starved voice send thread.
+
+    - A probe task on the event loop wakes up every `slow_callback_seconds / 2`
+      and records how late it was scheduled (event-loop lag).
+    - A watchdog thread notices when the probe hasn't run for more than
+      `slow_callback_seconds` and logs the event loop thread's stack at that
+      moment, which points at the slow callback.
+    - Every `report_interval` seconds, the loop lag and the frame send timing
+      of each playing guild (see `FrameTiming`) are logged as one JSON line.
+    """
+
+    def __init__(self, enabled: bool = True, report_interval: float = 60, slow_callback_seconds: float = 0.1):
+        self._lag_samples: deque[float] = deque(maxlen=4096)
+        self._stalls: deque[dict[str, Any]] = deque(maxlen=20)
+        self._tasks: list[asyncio.Task] = []
+        self._watchdog: threading.Thread | None = None
+        self._loop_thread_id: int | None = None
+        # perf_counter of the probe's last run; written by the loop, read by the watchdog
+        self._heartbeat = time.perf_counter()
+        # Frame counters of each guild at the previous report, for per-interval numbers
+        self._previous_frames: dict[int, tuple[int, int, float]] = {}
+        self.slow_callbacks = 0
+        self.last_report: dict[str, Any] = {}
+        self.configure(enabled, report_interval, slow_callback_seconds)
+
+    def configure(self, enabled: bool = True, report_interval: float = 60, slow_callback_seconds: float = 0.1) -> None:
+        self.enabled = enabled
+        self.report_interval = report_interval
+        self.slow_callback_seconds = slow_callback_seconds
+
+    def start(self) -> None:
+        """Start the probe, the periodic report and the watchdog. Must be called on the event loop."""
+        if not self.enabled or self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._tasks = [loop.create_task(self._probe()), loop.create_task(self._report_periodically())]
+        self._watchdog = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def _probe(self) -> None:
+        interval = self.slow_callback_seconds / 2
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            self._lag_samples.append(max(0.0, now - started - interval))
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while True:
+            time.sleep(self.slow_callback_seconds / 2)
+            heartbeat = self._heartbeat
+            blocked = time.perf_counter() - heartbeat
+            if blocked <= self.slow_callback_seconds or heartbeat == reported_heartbeat:
+                continue
+            # Report each stall once, with the code the event loop is stuck in right now
+            reported_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore[arg-type]
+            stack = traceback.format_stack(frame, limit=8) if frame is not None else []
+            location = stack[-1].strip().splitlines()[0] if stack else "unknown"
+            self.slow_callbacks += 1
+            self._stalls.append({"at": time.time(), "blocked_ms": round(blocked * 1000), "location": location})
+            logger.warning("Event loop blocked for more than %.0f ms in:\n%s", blocked * 1000, "".join(stack))
+
+    def _loop_lag(self) -> dict[str, float]:
+        samples = sorted(self._lag_samples)
+        if not samples:
+            return {"samples": 0}
+        return {
+            "samples": len(samples),
+            "mean_ms": round(statistics.mean(samples) * 1000, 2),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2),
+        }
+
+    def _guild_frames(self) -> dict[str, dict[str, float]]:
+        guilds = {}
+        previous, self._previous_frames = self._previous_frames, {}
+        for player in players:
+            timing = player.frame_timing
+            frames, late, jitter = timing.frames, timing.late_frames, timing.jitter_total
+            prev_frames, prev_late, prev_jitter = previous.get(player.guild_id, (0, 0, 0.0))
+            self._previous_frames[player.guild_id] = (frames, late, jitter)
+            sent = frames - prev_frames
+            if sent <= 0:
+                continue
+            guilds[str(player.guild_id)] = {
+                "frames": sent,
+                "late_frames": late - prev_late,
+                "jitter_ms": round((jitter - prev_jitter) / sent * 1000, 2),
+                "max_interval_ms": round(timing.max_interval * 1000, 2),
+            }
+            # A lost update racing the voice thread only affects one interval's maximum
+            timing.max_interval = 0.0
+        return guilds
+
+    def report(self) -> dict[str, Any]:
+        """Build the report for the interval since the previous one and log it."""
+        report = {
+            "loop_lag": self._loop_lag(),
+            "slow_callbacks": self.slow_callbacks,
+            "guilds": self._guild_frames(),
+        }
+        self._lag_samples.clear()
+        self.last_report = report
+        logger.info("health %s", json.dumps(report, separators=(",", ":")))
+        return report
+
+    async def _report_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            try:
+                self.report()
+            except Exception as exc:
+                logger.warning("Health report failed: %s", exc)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the live loop lag, the last periodic report and recent stalls."""
+        return {
+            "loop_lag": self._loop_lag(),
+            "slow_callbacks": self.slow_callbacks,
+            "recent_stalls": list(self._stalls),
+            "last_report": self.last_report,
+        }
+
+
+# Global monitor of this process
+health_monitor = HealthMonitor()
+
+
+def get_metrics() -> dict[str, Any]:
+    """Return the health monitor's numbers together with the stats of every component, as one dict."""
+    disk_cache = audio_manager.disk_cache
+    return {
+        "health": health_monitor.stats(),
+        "players": len(players),
+        "voice": voice_connections.stats(),
+        "extraction": extraction_executor.stats(),
+        "lookups": lookups.stats(),
+        "metadata_cache": metadata_cache.stats(),
+        "search_cache": search_cache.stats(),
+        "audio_cache": disk_cache.stats() if disk_cache is not None else None,
+        "loudness": loudness_analyzer.stats(),
+        "gaps": audio_manager.get_gap_stats(),
+        "buffers": audio_manager.get_buffer_stats(),
+        "resumes": audio_manager.get_resume_stats(),
+        "failures": audio_manager.get_failure_stats(),
+    }
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import math
+import queue
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+
+from youtube import set_loudness
+
+logger = logging.getLogger(__name__)
+
+# Last "I: ... LUFS" line of the ebur128 filter's summary
+_INTEGRATED_RE = re.compile(r"I:\s+(-?\d+(?:\.\d+)?) LUFS")
+
+# Videos whose analysis was queued or failed, so they aren't retried over and over
+_MAX_ATTEMPTED = 10_000
+
+
+def measure_loudness(source: str, timeout: float) -> float | None:
+    """Run FFmpeg's EBU R128 meter over a URL or file and return the integrated loudness (LUFS)."""
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-nostats",
+        "-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5",
+        "-i", source,
+        "-vn", "-af", "ebur128=framelog=quiet", "-f", "null", "-",
+    ]
+    if "://" not in source:
+        # The reconnect options are only valid for network input
+        del command[4:10]
+    result = subprocess.run(command, capture_output=True, timeout=timeout)
+    matches = _INTEGRATED_RE.findall(result.stderr.decode(errors="replace"))
+    if result.returncode != 0 or not matches:
+        return None
+    loudness = float(matches[-1])
+    # Digital silence measures as -70 LUFS (the gate); there is nothing to normalize
+    return loudness if loudness > -70.0 else None
+
+
+class LoudnessAnalyzer:
+    """
+    Measures the integrated loudness of tracks once, in the background, and turns
+    it into a per-track gain towards `target_lufs`.
+
+    Tracks are measured one at a time on a worker thread when they are first
+    prefetched or played. The result is stored with the track's metadata (memory
+    cache and SQLite store), so later plays only apply the precomputed gain and
+    never run a loudness filter live.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        target_lufs: float = -14.0,
+        max_boost_db: float = 6.0,
+        min_offset_db: float = 1.0,
+        max_track_seconds: int = 1200,
+    ):
+        self._queue: queue.Queue[tuple[asyncio.AbstractEventLoop, str, str, int] | None] = queue.Queue()
+        self._attempted: OrderedDict[str, None] = OrderedDict()
+        self._worker: threading.Thread | None = None
+        self.measured = 0
+        self.failed = 0
+        self.configure(enabled, target_lufs, max_boost_db, min_offset_db, max_track_seconds)
+
+    def configure(
+        self,
+        enabled: bool = True,
+        target_lufs: float = -14.0,
+        max_boost_db: float = 6.0,
+        min_offset_db: float = 1.0,
+        max_track_seconds: int = 1200,
+    ) -> None:
+        self.enabled = enabled
+        self.target_lufs = target_lufs
+        self.max_boost_db = max_boost_db
+        self.min_offset_db = min_offset_db
+        self.max_track_seconds = max_track_seconds
+
+    def gain_for(self, loudness: float | None) -> float:
+        """Linear gain that brings a track of the given loudness to the target (1.0 if unknown)."""
+        if not self.enabled or loudness is None:
+            return 1.0
+        offset_db = min(self.target_lufs - loudness, self.max_boost_db)
+        # Small offsets aren't audible; skipping them keeps unity gain (and Opus passthrough)
+        if abs(offset_db) < self.min_offset_db:
+            return 1.0
+        return math.pow(10.0, offset_db / 20.0)
+
+    def request(self, video_id: str | None, source: str | None, duration: int | None) -> None:
+        """Queue a measurement of a track whose loudness is not known yet. Must be called on the event loop."""
+        if not self.enabled or not video_id or not source or video_id in self._attempted:
+            return
+        if not duration or duration > self.max_track_seconds:
+            return
+        self._attempted[video_id] = None
+        while len(self._attempted) > _MAX_ATTEMPTED:
+            self._attempted.popitem(last=False)
+
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._measure_loop, name="loudness-analyzer", daemon=True)
+            self._worker.start()
+        self._queue.put((asyncio.get_running_loop(), video_id, source, duration))
+
+    def _measure_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            loop, video_id, source, duration = job
+            try:
+                loudness = measure_loudness(source, timeout=max(120, duration))
+            except Exception as exc:
+                loudness = None
+                logger.debug("Loudness measurement of %s failed: %s", video_id, exc)
+            if loudness is None:
+                self.failed += 1
+                continue
+            self.measured += 1
+            logger.debug("Integrated loudness of %s: %.1f LUFS", video_id, loudness)
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(set_loudness, video_id, loudness)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "measured": self.measured,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+        }
+
+
+# Global analyzer shared by all guilds
+loudness_analyzer = LoudnessAnalyzer()
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, urlparse
+
+if TYPE_CHECKING:
+    from youtube import YouTubeMetadata
+
+
+def parse_stream_expiry(stream_url: str | None) -> float | None:
+    """Return the unix timestamp in the `expire=` query parameter of a googlevideo URL."""
+    if not stream_url:
+        return None
+    try:
+        expire = parse_qs(urlparse(stream_url).query).get("expire")
+        if expire:
+            return float(expire[0])
+        # Some manifests carry the parameter as a path segment (/expire/<ts>/)
+        parts = urlparse(stream_url).path.split("/")
+        if "expire" in parts:
+            return float(parts[parts.index("expire") + 1])
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+class _CacheEntry:
+    __slots__ = ("metadata", "stored_at", "stream_expires_at")
+
+    def __init__(self, metadata: YouTubeMetadata, stored_at: float, stream_expires_at: float | None):
+        self.metadata = metadata
+        self.stored_at = stored_at
+        self.stream_expires_at = stream_expires_at
+
+
+class MetadataCache:
+    """
+    In-memory LRU cache of `YouTubeMetadata` keyed by canonical video ID.
+
+    Metadata (title, duration, ...) is kept for `metadata_ttl` seconds. The stream URL
+    is only handed out until `expiry_margin` seconds before the expiry encoded in the
+    URL itself; URLs without a parseable expiry fall back to `default_stream_ttl`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        metadata_ttl: float = 24 * 3600,
+        expiry_margin: float = 300,
+        refresh_ahead: float = 900,
+        default_stream_ttl: float = 3600,
+    ):
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stream_misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.configure(max_entries, metadata_ttl, expiry_margin, refresh_ahead, default_stream_ttl)
+
+    def configure(
+        self,
+        max_entries: int = 1024,
+        metadata_ttl: float = 24 * 3600,
+        expiry_margin: float = 300,
+        refresh_ahead: float = 900,
+        default_stream_ttl: float = 3600,
+    ) -> None:
+        """Update the cache bounds; shrinking evicts the least recently used entries."""
+        self.max_entries = max(1, max_entries)
+        self.metadata_ttl = metadata_ttl
+        self.expiry_margin = expiry_margin
+        self.refresh_ahead = refresh_ahead
+        self.default_stream_ttl = default_stream_ttl
+        self._evict_overflow()
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, video_id: str) -> _CacheEntry | None:
+        entry = self._entries.get(video_id)
+        if entry is None:
+            return None
+        if time.time() - entry.stored_at > self.metadata_ttl:
+            del self._entries[video_id]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(video_id)
+        return entry
+
+    def _stream_is_fresh(self, entry: _CacheEntry, now: float) -> bool:
+        return (
+            entry.metadata.stream_url is not None
+            and entry.stream_expires_at is not None
+            and now < entry.stream_expires_at - self.expiry_margin
+        )
+
+    def get_playable(self, video_id: str) -> YouTubeMetadata | None:
+        """Return cached metadata only if it carries a stream URL that is still fresh."""
+        entry = self._lookup(video_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not self._stream_is_fresh(entry, time.time()):
+            self.stream_misses += 1
+            return None
+        self.hits += 1
+        return entry.metadata.model_copy()
+
+    def stream_expires_at(self, video_id: str) -> float | None:
+        """Return when the cached stream URL expires (unix time), without counting a lookup."""
+        entry = self._entries.get(video_id)
+        if entry is None or entry.metadata.stream_url is None:
+            return None
+        return entry.stream_expires_at
+
+    def loudness(self, video_id: str) -> float | None:
+        """Return the measured loudness of a cached video, without counting a lookup."""
+        entry = self._entries.get(video_id)
+        return entry.metadata.loudness if entry is not None else None
+
+    def needs_refresh(self, video_id: str) -> bool:
+        """True if the cached stream URL is still usable but about to expire."""
+        entry = self._entries.get(video_id)
+        if entry is None or entry.stream_expires_at is None:
+            return False
+        return time.time() >= entry.stream_expires_at - self.expiry_margin - self.refresh_ahead
+
+    def put(self, metadata: YouTubeMetadata) -> None:
+        """
+        Insert or update an entry. Metadata without a stream URL keeps a cached fresh
+        one, metadata without a loudness keeps the measured one.
+        """
+        video_id = metadata.video_id
+        if not video_id:
+            return
+
+        now = time.time()
+        existing = self._entries.get(video_id)
+        if metadata.stream_url is None and existing is not None and self._stream_is_fresh(existing, now):
+            metadata = metadata.model_copy(update={"stream_url": existing.metadata.stream_url})
+            expires_at = existing.stream_expires_at
+        elif metadata.stream_url is not None:
+            expires_at = parse_stream_expiry(metadata.stream_url) or now + self.default_stream_ttl
+        else:
+            expires_at = None
+        if metadata.loudness is None and existing is not None and existing.metadata.loudness is not None:
+            metadata = metadata.model_copy(update={"loudness": existing.metadata.loudness})
+
+        self._entries[video_id] = _CacheEntry(metadata.model_copy(), now, expires_at)
+        self._entries.move_to_end(video_id)
+        self._evict_overflow()
+
+    def set_loudness(self, video_id: str, loudness: float) -> None:
+        """Attach a measured integrated loudness (LUFS) to a cached entry, if there is one."""
+        entry = self._entries.get(video_id)
+        if entry is not None:
+            entry.metadata = entry.metadata.model_copy(update={"loudness": loudness})
+
+    def invalidate(self, video_id: str) -> None:
+        """Drop a single entry, e.g. after its stream URL turned out to be dead."""
+        self._entries.pop(video_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stream_misses": self.stream_misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+        }
+
+
+class _SearchEntry:
+    __slots__ = ("results", "fetched_limit", "stored_at")
+
+    def __init__(self, results: list[YouTubeMetadata], fetched_limit: int, stored_at: float):
+        self.results = results
+        self.fetched_limit = fetched_limit
+        self.stored_at = stored_at
+
+
+class SearchCache:
+    """
+    In-memory LRU cache of search results keyed by normalized query.
+
+    Only the largest result list fetched for a query is kept; a search with a
+    smaller limit is answered from its prefix. Entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600):
+        self._entries: OrderedDict[str, _SearchEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.configure(max_entries, ttl)
+
+    def configure(self, max_entries: int = 256, ttl: float = 3600) -> None:
+        """Update the cache bounds; shrinking evicts the least recently used entries."""
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._evict_overflow()
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, query: str) -> _SearchEntry | None:
+        entry = self._entries.get(query)
+        if entry is None:
+            return None
+        if time.time() - entry.stored_at > self.ttl:
+            del self._entries[query]
+            self.evictions += 1
+            return None
+        return entry
+
+    def get(self, query: str, limit: int) -> list[YouTubeMetadata] | None:
+        """Return the first `limit` results if a large enough search is cached."""
+        entry = self._lookup(query)
+        # A search that came back short has no more results to offer
+        if entry is None or (entry.fetched_limit < limit and len(entry.results) >= entry.fetched_limit):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(query)
+        return entry.results[:limit]
+
+    def put(self, query: str, limit: int, results: list[YouTubeMetadata]) -> None:
+        """Remember the results of a search, unless a larger fresh one is cached already."""
+        existing = self._lookup(query)
+        if existing is not None and existing.fetched_limit > limit:
+            return
+        self._entries[query] = _SearchEntry(list(results), limit, time.time())
+        self._entries.move_to_end(query)
+        self._evict_overflow()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
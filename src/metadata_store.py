@@ -0,0 +1,270 @@
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id       TEXT PRIMARY KEY,
+    title          TEXT NOT NULL,
+    duration       INTEGER NOT NULL,
+    thumbnail      TEXT NOT NULL,
+    webpage_url    TEXT NOT NULL,
+    stream_url     TEXT,
+    stream_expires REAL,
+    last_access    REAL NOT NULL,
+    loudness       REAL
+);
+CREATE INDEX IF NOT EXISTS videos_last_access ON videos (last_access);
+
+CREATE TABLE IF NOT EXISTS searches (
+    query         TEXT PRIMARY KEY,
+    fetched_limit INTEGER NOT NULL,
+    video_ids     TEXT NOT NULL,
+    last_access   REAL NOT NULL,
+    exhausted     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS searches_last_access ON searches (last_access);
+"""
+
+# Columns added after the first release, created on open for older databases
+_ADDED_COLUMNS = {
+    "videos": {"loudness": "REAL"},
+    # Set if the search returned fewer results than `fetched_limit`, i.e. all there are
+    "searches": {"exhausted": "INTEGER NOT NULL DEFAULT 0"},
+}
+
+# Rows written without a stream URL (e.g. from searches) keep the stored one; the
+# loudness is only ever set separately and survives updates
+_UPSERT_VIDEO = """
+INSERT INTO videos (video_id, title, duration, thumbnail, webpage_url, stream_url, stream_expires, last_access)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (video_id) DO UPDATE SET
+    title          = excluded.title,
+    duration       = excluded.duration,
+    thumbnail      = excluded.thumbnail,
+    webpage_url    = excluded.webpage_url,
+    stream_url     = COALESCE(excluded.stream_url, videos.stream_url),
+    stream_expires = COALESCE(excluded.stream_expires, videos.stream_expires),
+    last_access    = excluded.last_access
+"""
+
+# Like the in-memory search cache, a mapping is never replaced by one fetched with a
+# smaller limit (e.g. a `!play` top hit after a `!search`)
+_UPSERT_SEARCH = """
+INSERT INTO searches (query, fetched_limit, video_ids, exhausted, last_access)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (query) DO UPDATE SET
+    video_ids     = CASE WHEN excluded.fetched_limit >= searches.fetched_limit
+                         THEN excluded.video_ids ELSE searches.video_ids END,
+    exhausted     = CASE WHEN excluded.fetched_limit >= searches.fetched_limit
+                         THEN excluded.exhausted ELSE searches.exhausted END,
+    fetched_limit = MAX(excluded.fetched_limit, searches.fetched_limit),
+    last_access   = excluded.last_access
+"""
+
+_VIDEO_COLUMNS = (
+    "video_id", "title", "duration", "thumbnail", "webpage_url", "stream_url", "stream_expires", "loudness",
+)
+
+
+class MetadataStore:
+    """
+    SQLite-backed store for video metadata and search-query -> video ID mappings.
+
+    Reads are single indexed lookups on the caller's thread. Writes (including
+    last-access bumps) are buffered and committed in batches by a background
+    writer thread, which also keeps each table below `max_entries` rows by
+    evicting the least recently accessed ones. The database runs in WAL mode so
+    the reader never waits for the writer.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 50_000, batch_size: int = 64, flush_interval: float = 5.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, max_entries)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        self._read_conn = self._connect()
+        self._read_conn.executescript(_SCHEMA)
+        self._migrate()
+        self._read_lock = threading.Lock()
+
+        self._pending_videos: dict[str, tuple[Any, ...]] = {}
+        self._pending_searches: dict[str, tuple[Any, ...]] = {}
+        self._pending_touches: dict[str, float] = {}
+        self._pending_loudness: dict[str, float] = {}
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._writer = threading.Thread(target=self._writer_loop, name="metadata-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Bot processes sharing the file wait for each other's write transactions
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _migrate(self) -> None:
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._read_conn.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns.items():
+                if column not in existing:
+                    self._read_conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    # ------------------------------------------------------------------ reads
+
+    def get_video(self, video_id: str) -> dict[str, Any] | None:
+        """Return the stored row for a video as a dict, or None."""
+        with self._read_lock:
+            row = self._read_conn.execute(
+                f"SELECT {', '.join(_VIDEO_COLUMNS)} FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        self._touch(video_id)
+        return dict(zip(_VIDEO_COLUMNS, row))
+
+    def get_search(self, query: str, limit: int) -> list[dict[str, Any]] | None:
+        """
+        Return the stored results for a normalized query if at least `limit` results
+        were fetched for it before (or the search returned all there are) and every
+        result is still in the store.
+        """
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT fetched_limit, video_ids, exhausted FROM searches WHERE query = ?", (query,)
+            ).fetchone()
+            if row is None or (row[0] < limit and not row[2]):
+                return None
+            video_ids = [vid for vid in row[1].split(",") if vid][:limit]
+            if not video_ids:
+                return []
+            placeholders = ", ".join("?" * len(video_ids))
+            rows = self._read_conn.execute(
+                f"SELECT {', '.join(_VIDEO_COLUMNS)} FROM videos WHERE video_id IN ({placeholders})", video_ids
+            ).fetchall()
+
+        by_id = {row[0]: dict(zip(_VIDEO_COLUMNS, row)) for row in rows}
+        if len(by_id) != len(video_ids):
+            return None
+        self._touch(f"q:{query}")
+        for video_id in video_ids:
+            self._touch(video_id)
+        return [by_id[video_id] for video_id in video_ids]
+
+    # ----------------------------------------------------------------- writes
+
+    def put_video(
+        self,
+        video_id: str,
+        title: str,
+        duration: int,
+        thumbnail: str,
+        webpage_url: str,
+        stream_url: str | None = None,
+        stream_expires: float | None = None,
+    ) -> None:
+        """Queue an insert/update of a video row."""
+        row = (video_id, title, duration, thumbnail, webpage_url, stream_url, stream_expires, time.time())
+        with self._pending_lock:
+            self._pending_videos[video_id] = row
+            self._maybe_wake()
+
+    def put_loudness(self, video_id: str, loudness: float) -> None:
+        """Queue storing the measured integrated loudness (LUFS) of an already stored video."""
+        with self._pending_lock:
+            self._pending_loudness[video_id] = loudness
+            self._maybe_wake()
+
+    def put_search(self, query: str, fetched_limit: int, video_ids: list[str], exhausted: bool = False) -> None:
+        """
+        Queue an insert/update of a search-query mapping; a larger stored one is kept.
+        `exhausted` marks a search that returned fewer than `fetched_limit` results.
+        """
+        row = (query, fetched_limit, ",".join(video_ids), int(exhausted), time.time())
+        with self._pending_lock:
+            pending = self._pending_searches.get(query)
+            if pending is not None and pending[1] > fetched_limit:
+                row = (*pending[:-1], row[-1])
+            self._pending_searches[query] = row
+            self._maybe_wake()
+
+    def _touch(self, key: str) -> None:
+        with self._pending_lock:
+            self._pending_touches[key] = time.time()
+
+    def _maybe_wake(self) -> None:
+        if len(self._pending_videos) + len(self._pending_searches) >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        """Ask the writer to commit everything buffered so far."""
+        self._wakeup.set()
+
+    def _writer_loop(self) -> None:
+        conn = self._connect()
+        try:
+            while not self._closed.is_set():
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self._write_batch(conn)
+            self._write_batch(conn)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection) -> None:
+        with self._pending_lock:
+            videos = list(self._pending_videos.values())
+            searches = list(self._pending_searches.values())
+            touches = self._pending_touches
+            loudness = [(lufs, video_id) for video_id, lufs in self._pending_loudness.items()]
+            self._pending_videos = {}
+            self._pending_searches = {}
+            self._pending_touches = {}
+            self._pending_loudness = {}
+        if not (videos or searches or touches or loudness):
+            return
+
+        video_touches = [(ts, key) for key, ts in touches.items() if not key.startswith("q:")]
+        search_touches = [(ts, key[2:]) for key, ts in touches.items() if key.startswith("q:")]
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(_UPSERT_VIDEO, videos)
+            conn.executemany(_UPSERT_SEARCH, searches)
+            conn.executemany("UPDATE videos SET last_access = ? WHERE video_id = ?", video_touches)
+            conn.executemany("UPDATE videos SET loudness = ? WHERE video_id = ?", loudness)
+            conn.executemany("UPDATE searches SET last_access = ? WHERE query = ?", search_touches)
+            for table, key, written in (("videos", "video_id", videos), ("searches", "query", searches)):
+                if not written:
+                    continue
+                conn.execute(
+                    f"DELETE FROM {table} WHERE {key} IN ("
+                    f"SELECT {key} FROM {table} ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error as exc:
+            logger.error("Failed to write metadata batch: %s", exc)
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+
+    def close(self) -> None:
+        """Flush buffered writes and stop the writer thread."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wakeup.set()
+        self._writer.join()
+        with self._read_lock:
+            self._read_conn.close()
@@ -1,54 +1,147 @@
 import random
-from typing import List, Optional
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, List, Optional
 
-from youtube import YouTubeMetadata
+from youtube import YouTubeMetadata, video_url
+
+
+class QueueEntry:
+    """
+    Compact queue record. Only the video ID plus what the queue embeds display is
+    kept; the stream URL is resolved (usually from the metadata cache) at play time.
+    """
+
+    __slots__ = ("video_id", "title", "duration", "thumbnail")
+
+    def __init__(self, video_id: str, title: str, duration: int, thumbnail: str):
+        self.video_id = video_id
+        self.title = title
+        self.duration = duration
+        self.thumbnail = thumbnail
+
+    @property
+    def webpage_url(self) -> str:
+        # Songs without a known video ID keep their full URL in `video_id`
+        return self.video_id if "://" in self.video_id else video_url(self.video_id)
+
+    def __repr__(self) -> str:
+        return f"QueueEntry({self.video_id!r}, {self.title!r})"
 
 
 class MusicQueue:
-    """Manages the music playback queue and current song state."""
+    """
+    Manages the music playback queue and current song state.
+
+    Backed by a deque: appending and taking the next song are O(1), skipping k
+    songs is O(k) and removing by index costs O(min(i, n - i)).
+    """
+
+    __slots__ = ("_queue", "_current", "_listeners", "_strings", "_refs", "_clears")
 
     def __init__(self):
-        self._queue: List[YouTubeMetadata] = []
+        self._queue: Deque[QueueEntry] = deque()
         self._current: Optional[YouTubeMetadata] = None
+        self._listeners: List[Callable[[bool], None]] = []
+        # Interned IDs/titles/thumbnails, so repeated songs share one string object,
+        # with the number of queued references to each
+        self._strings: dict[str, str] = {}
+        self._refs: dict[str, int] = {}
+        self._clears = 0
+
+    def _intern(self, value: str) -> str:
+        value = self._strings.setdefault(value, value)
+        self._refs[value] = self._refs.get(value, 0) + 1
+        return value
+
+    def _release(self, song: QueueEntry) -> None:
+        # Drop strings no queued song refers to any more, so the table never
+        # outgrows the queue itself
+        for value in (song.video_id, song.title, song.thumbnail):
+            refs = self._refs[value] - 1
+            if refs:
+                self._refs[value] = refs
+            else:
+                del self._refs[value]
+                del self._strings[value]
+
+    def subscribe(self, listener: Callable[[bool], None]) -> None:
+        """
+        Register a callback that runs after every change to the queue. It receives
+        True if existing entries were removed or reordered, False if songs were only
+        appended or taken from the front.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, reordered: bool) -> None:
+        for listener in self._listeners:
+            listener(reordered)
 
     def add(self, metadata: YouTubeMetadata) -> None:
         """Add a song to the end of the queue."""
-        self._queue.append(metadata)
-
-    def remove(self, index: int) -> Optional[YouTubeMetadata]:
+        self._queue.append(QueueEntry(
+            self._intern(metadata.video_id or metadata.webpage_url),
+            self._intern(metadata.title),
+            metadata.duration,
+            self._intern(metadata.thumbnail),
+        ))
+        self._notify(False)
+
+    def remove(self, index: int) -> Optional[QueueEntry]:
         """Remove and return the song at the given index (1-based)."""
         if 1 <= index <= len(self._queue):
-            return self._queue.pop(index - 1)
+            removed = self._queue[index - 1]
+            del self._queue[index - 1]
+            self._release(removed)
+            self._notify(True)
+            return removed
         return None
 
     def clear(self) -> None:
         """Clear all songs from the queue."""
         self._queue.clear()
+        self._clears += 1
+        self._strings.clear()
+        self._refs.clear()
+        self._notify(True)
+
+    @property
+    def clear_count(self) -> int:
+        """Number of times the queue has been cleared, for noticing a clear across awaits."""
+        return self._clears
 
-    def skip(self) -> Optional[YouTubeMetadata]:
+    def skip(self) -> Optional[QueueEntry]:
         """Remove and return the next song in the queue."""
         if self._queue:
-            return self._queue.pop(0)
+            song = self._queue.popleft()
+            self._release(song)
+            self._notify(False)
+            return song
         return None
 
-    def skip_n(self, n: int) -> Optional[YouTubeMetadata]:
+    def skip_n(self, n: int) -> Optional[QueueEntry]:
         """Skip to the nth song in the queue, removing all songs before it."""
         if n < 1 or n > len(self._queue):
             return None
 
         # Remove songs 1 through n-1
+        popleft = self._queue.popleft
         for _ in range(n - 1):
-            if self._queue:
-                self._queue.pop(0)
+            self._release(popleft())
 
-        # Return the nth song (now at index 0)
-        if self._queue:
-            return self._queue.pop(0)
-        return None
+        # Return the nth song (now at the front)
+        song = popleft()
+        self._release(song)
+        self._notify(True)
+        return song
 
     def shuffle(self) -> None:
         """Randomly shuffle the order of songs in the queue."""
-        random.shuffle(self._queue)
+        # Shuffling a deque in place would index into its middle on every swap
+        songs = list(self._queue)
+        random.shuffle(songs)
+        self._queue = deque(songs)
+        self._notify(True)
 
     def get_current(self) -> Optional[YouTubeMetadata]:
         """Get the currently playing song metadata."""
@@ -58,9 +151,13 @@ class MusicQueue:
         """Set the currently playing song."""
         self._current = metadata
 
-    def get_queue(self) -> List[YouTubeMetadata]:
+    def peek(self, n: int) -> List[QueueEntry]:
+        """Get the next n songs without removing them."""
+        return list(islice(self._queue, n))
+
+    def get_queue(self) -> List[QueueEntry]:
         """Get a copy of the current queue."""
-        return self._queue.copy()
+        return list(self._queue)
 
     def is_empty(self) -> bool:
         """Check if the queue is empty."""
@@ -69,7 +166,3 @@ class MusicQueue:
     def size(self) -> int:
         """Get the number of songs in the queue."""
         return len(self._queue)
-
-
-# Global queue instance
-music_queue = MusicQueue()
\ No newline at end of file
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+import discord
+from discord.ext import commands
+
+from audio_sources import FrameTiming, PreparedSource, TrackedSource
+from music_queue import MusicQueue
+from prefetcher import QueuePrefetcher
+from voice_manager import voice_connections
+
+logger = logging.getLogger(__name__)
+
+
+class NowPlaying:
+    """The track a guild is playing, with everything needed to restart it at another position."""
+
+    __slots__ = ("url", "duration", "codec", "video_id", "loudness", "source", "resumes", "refreshed", "failed")
+
+    def __init__(
+        self,
+        url: str,
+        duration: int | None,
+        codec: str | None,
+        video_id: str | None,
+        loudness: float | None,
+        refreshed: bool = False,
+    ):
+        self.url = url
+        self.duration = duration
+        self.codec = codec
+        self.video_id = video_id
+        self.loudness = loudness
+        self.source: TrackedSource | None = None
+        # Consecutive automatic resumes after the stream broke off
+        self.resumes = 0
+        # The stream URL was re-extracted after a failure, so the next failure skips the track
+        self.refreshed = refreshed
+        # Set when playback ended in an error or without producing any audio
+        self.failed = False
+
+    @property
+    def position(self) -> float:
+        """Seconds into the track that have been sent to Discord."""
+        return self.source.position if self.source is not None else 0.0
+
+
+class GuildPlayer:
+    """Playback state of a single guild: queue, volume, voice client and look-ahead work."""
+
+    __slots__ = (
+        "guild_id",
+        "queue",
+        "prefetcher",
+        "volume",
+        "track_gain",
+        "voice_client",
+        "generation",
+        "prepared",
+        "now_playing",
+        "finished",
+        "finished_track",
+        "skip_requests",
+        "runner",
+        "track_ended_at",
+        "frame_timing",
+        "last_active",
+    )
+
+    def __init__(self, guild_id: int, volume: float = 0.5, prefetch_options: dict[str, Any] | None = None):
+        self.guild_id = guild_id
+        self.queue = MusicQueue()
+        self.prefetcher = QueuePrefetcher(self.queue, guild_id=guild_id, **(prefetch_options or {}))
+        # Volume (0.0 to 1.0)
+        self.volume = volume
+        # Loudness normalization gain of the current track, applied on top of the volume
+        self.track_gain = 1.0
+        self.voice_client: discord.VoiceClient | None = None
+        # Bumped whenever playback is stopped on purpose, so stale `after` callbacks are ignored
+        self.generation = 0
+        # Next track's source, started ahead of time: (stream URL, effective volume, source, prebuffer task)
+        self.prepared: tuple[str, float, PreparedSource, asyncio.Future] | None = None
+        # The current track, for seeking and resuming after stream errors
+        self.now_playing: NowPlaying | None = None
+        # Set (on the event loop) when a track ends; the runner task then starts the next one
+        self.finished = asyncio.Event()
+        self.finished_track: NowPlaying | None = None
+        # Pending `!skip`s: the track each one wants skipped and a future for whether a song was played
+        self.skip_requests: list[tuple[NowPlaying | None, asyncio.Future]] = []
+        self.runner: asyncio.Task | None = None
+        # End of the previous track, for measuring the gap to the next one
+        self.track_ended_at: float | None = None
+        # Send timing of this guild's audio frames, read by the health monitor
+        self.frame_timing = FrameTiming()
+        self.last_active = time.monotonic()
+        self.queue.subscribe(self._on_queue_change)
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    @property
+    def effective_volume(self) -> float:
+        """Volume the current track is played at, including its loudness normalization."""
+        return self.volume * self.track_gain
+
+    def is_playing(self) -> bool:
+        vc = self.voice_client
+        return vc is not None and vc.is_connected() and (vc.is_playing() or vc.is_paused())
+
+    def discard_prepared(self) -> None:
+        """Forget the pre-started next track and kill its FFmpeg process."""
+        if self.prepared is not None:
+            _, _, source, task = self.prepared
+            self.prepared = None
+            # Cleaning up kills FFmpeg; wait for the prebuffer thread to let go of it
+            task.add_done_callback(lambda _: source.cleanup())
+
+    def _on_queue_change(self, reordered: bool) -> None:
+        self.touch()
+        # A pre-started track is only useful while it is still next in line
+        if reordered:
+            self.discard_prepared()
+
+    async def close(self) -> None:
+        """Cancel background work and leave the voice channel."""
+        self.prefetcher.cancel()
+        if self.runner is not None:
+            self.runner.cancel()
+        for _, done in self.skip_requests:
+            if not done.done():
+                done.set_result(False)
+        self.skip_requests = []
+        self.discard_prepared()
+        await voice_connections.disconnect(self.guild_id)
+        if self.voice_client is not None and self.voice_client.is_connected():
+            await self.voice_client.disconnect()
+        self.voice_client = None
+
+
+class PlayerRegistry:
+    """
+    Lazily creates one `GuildPlayer` per guild and drops players that have been
+    idle (nothing playing, no commands) for `idle_timeout` seconds.
+    """
+
+    def __init__(self, idle_timeout: float = 600, default_volume: float = 0.5):
+        self._players: dict[int, GuildPlayer] = {}
+        self.idle_timeout = idle_timeout
+        self.default_volume = default_volume
+        self.prefetch_options: dict[str, Any] = {}
+        self._reaper: asyncio.Task | None = None
+
+    def configure(self, idle_timeout: float, default_volume: float, **prefetch_options: Any) -> None:
+        self.idle_timeout = idle_timeout
+        self.default_volume = default_volume
+        self.prefetch_options = prefetch_options
+
+    def get(self, guild_id: int) -> GuildPlayer:
+        """Return the guild's player, creating it on first use."""
+        player = self._players.get(guild_id)
+        if player is None:
+            player = GuildPlayer(guild_id, self.default_volume, self.prefetch_options)
+            self._players[guild_id] = player
+        player.touch()
+        return player
+
+    def peek(self, guild_id: int) -> GuildPlayer | None:
+        """Return the guild's player without creating one."""
+        return self._players.get(guild_id)
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __iter__(self):
+        return iter(list(self._players.values()))
+
+    async def remove(self, guild_id: int) -> None:
+        player = self._players.pop(guild_id, None)
+        if player is not None:
+            await player.close()
+
+    def start(self) -> None:
+        """Start the background task that cleans up idle players."""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        interval = max(1.0, min(60.0, self.idle_timeout / 2))
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for player in list(self._players.values()):
+                if player.is_playing():
+                    player.touch()
+                elif now - player.last_active > self.idle_timeout:
+                    logger.info("Cleaning up idle player for guild %s", player.guild_id)
+                    try:
+                        await self.remove(player.guild_id)
+                    except Exception as exc:
+                        logger.warning("Failed to clean up player for guild %s: %s", player.guild_id, exc)
+
+
+# Global registry of per-guild players
+players = PlayerRegistry()
+
+
+def get_player(ctx: commands.Context) -> GuildPlayer:
+    """Return the player of the guild the command was issued in."""
+    return players.get(ctx.guild.id)  # type: ignore[union-attr]
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+
+from extraction_executor import Priority
+from loudness import loudness_analyzer
+from music_queue import MusicQueue, QueueEntry
+from youtube import YouTubeMetadata, extract_info, metadata_cache
+
+logger = logging.getLogger(__name__)
+
+
+class QueuePrefetcher:
+    """
+    Keeps the next `depth` queue entries resolved with a stream URL that is not
+    about to expire. Resolved URLs live in the metadata cache, where playback
+    picks them up.
+
+    A single background task walks the front of the queue, extracts entries that
+    have no cached stream URL or whose URL expires within `refresh_margin` seconds (at most
+    `concurrency` extractions at a time), then sleeps until the next URL in the
+    window gets close to its expiry or the queue changes. Clearing or reordering
+    the queue cancels in-flight work and starts over.
+    """
+
+    __slots__ = ("_queue", "guild_id", "depth", "refresh_margin", "_semaphore", "_wakeup", "_task")
+
+    def __init__(
+        self,
+        queue: MusicQueue,
+        depth: int = 3,
+        concurrency: int = 2,
+        refresh_margin: float = 1200,
+        guild_id: int | None = None,
+    ):
+        self._queue = queue
+        self.guild_id = guild_id
+        self.depth = depth
+        self.refresh_margin = refresh_margin
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        queue.subscribe(self._on_queue_change)
+
+    def _on_queue_change(self, reordered: bool) -> None:
+        if self.depth <= 0:
+            return
+        if reordered:
+            self.cancel()
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def cancel(self) -> None:
+        """Stop all in-flight prefetching."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def _usable_until(self, video_id: str) -> float | None:
+        expires_at = metadata_cache.stream_expires_at(video_id)
+        if expires_at is None:
+            return None
+        return expires_at - metadata_cache.expiry_margin
+
+    def is_stale(self, song: QueueEntry, margin: float | None = None) -> bool:
+        """True if no cached stream URL for the song stays usable for `margin` more seconds."""
+        usable_until = self._usable_until(song.video_id)
+        if usable_until is None:
+            return True
+        return usable_until - time.time() < (self.refresh_margin if margin is None else margin)
+
+    async def ensure_fresh(
+        self, song: QueueEntry, margin: float = 60, priority: Priority = Priority.NOW_PLAYING
+    ) -> YouTubeMetadata:
+        """Return playable metadata whose stream URL is valid for at least `margin` more seconds."""
+        meta = await extract_info(song.webpage_url, guild_id=self.guild_id, priority=priority)
+        if not self.is_stale(song, margin):
+            return meta
+        # The cache handed back a URL that is too close to its expiry
+        return await extract_info(song.webpage_url, refresh=True, guild_id=self.guild_id, priority=priority)
+
+    async def _prefetch(self, song: QueueEntry) -> None:
+        async with self._semaphore:
+            if not self.is_stale(song):
+                return
+            try:
+                meta = await self.ensure_fresh(song, self.refresh_margin, Priority.PREFETCH)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Prefetch of %s failed: %s", song.webpage_url, exc)
+                return
+            if meta.loudness is None:
+                loudness_analyzer.request(meta.video_id, meta.stream_url, meta.duration)
+
+    def _seconds_until_stale(self, window: list[QueueEntry]) -> float | None:
+        deadlines = [
+            usable_until - self.refresh_margin - time.time()
+            for song in window
+            if (usable_until := self._usable_until(song.video_id)) is not None
+        ]
+        if not deadlines:
+            return None
+        return max(1.0, min(deadlines))
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            window = self._queue.peek(self.depth)
+            stale = [song for song in window if self.is_stale(song)]
+            if stale:
+                await asyncio.gather(*(self._prefetch(song) for song in stale))
+                # Failed entries stay stale; retry them after a short pause
+                if any(self.is_stale(song) for song in stale):
+                    delay = 30.0
+                else:
+                    delay = self._seconds_until_stale(window)
+            else:
+                delay = self._seconds_until_stale(window)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
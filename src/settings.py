@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Self
+from typing import Literal, Self
 
 from pydantic import BaseModel, ConfigDict, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,6 +15,80 @@ class Settings(BaseSettings):
 
     OPUS_LIB_NAME: str = "/opt/homebrew/Cellar/opus/1.5.2/lib/libopus.dylib"
 
+    # Number of long-lived YoutubeDL instances per pool (search / extraction)
+    YTDL_POOL_SIZE: int = 4
+    # Threads running yt-dlp jobs, and how many more may wait before requests are refused
+    EXTRACTION_WORKERS: int = 4
+    EXTRACTION_QUEUE_SIZE: int = 64
+    # "process" runs yt-dlp in worker processes, keeping its CPU work off the bot's GIL
+    EXTRACTION_BACKEND: Literal["thread", "process"] = "thread"
+
+    # In-memory metadata / stream URL cache
+    METADATA_CACHE_SIZE: int = 1024
+    METADATA_CACHE_TTL: float = 24 * 3600           # seconds
+    STREAM_URL_EXPIRY_MARGIN: float = 300           # stop using stream URLs this long before they expire
+    STREAM_URL_REFRESH_AHEAD: float = 900           # refresh in the background this long before the margin
+    SEARCH_CACHE_SIZE: int = 256                    # queries
+    SEARCH_CACHE_TTL: float = 3600                  # seconds
+    # Top !search results resolved while the user picks one (0 disables)
+    SEARCH_SPECULATIVE_RESULTS: int = 3
+
+    # Optional SQLite metadata store that survives restarts (disabled if unset)
+    METADATA_STORE_PATH: Path | None = None
+    METADATA_STORE_MAX_ENTRIES: int = 50_000
+
+    # Optional disk cache for frequently played tracks (disabled if unset)
+    AUDIO_CACHE_DIR: Path | None = None
+    AUDIO_CACHE_MAX_MB: int = 2048
+    AUDIO_CACHE_MIN_PLAYS: int = 2                  # plays before a track is downloaded
+    AUDIO_CACHE_MAX_TRACK_SECONDS: int = 1200       # longer tracks are never cached
+
+    # Sharding: SHARD_COUNT shards (unset: no sharding, or one per worker) spread over
+    # SHARD_WORKERS processes, which a supervisor process restarts if they crash
+    SHARD_COUNT: int | None = None
+    SHARD_WORKERS: int = 1
+
+    # Per-guild players are dropped (and leave voice) after this many idle seconds
+    PLAYER_IDLE_TIMEOUT: float = 600
+    DEFAULT_VOLUME: int = 50                        # percent
+
+    # Voice connections stay connected this long without playback (the player and its queue are kept)
+    VOICE_IDLE_TIMEOUT: float = 300
+    VOICE_CONNECT_TIMEOUT: float = 15
+    # Seconds a dropped voice session gets to resume before connecting from scratch
+    VOICE_RESUME_WAIT: float = 5
+
+    # Background resolution of upcoming queue entries
+    PREFETCH_DEPTH: int = 3                         # 0 disables prefetching
+    PREFETCH_CONCURRENCY: int = 2
+    PREFETCH_REFRESH_MARGIN: float = 1200           # re-extract URLs expiring within this many seconds
+
+    # Entries taken from a single playlist URL
+    PLAYLIST_MAX_ENTRIES: int = 1000
+
+    # "pcm" decodes and re-encodes in-process, "opus" lets FFmpeg produce Opus packets
+    PLAYBACK_MODE: Literal["pcm", "opus"] = "pcm"
+    # 20 ms frames read ahead of playback to ride out network stalls (0 disables)
+    READ_AHEAD_FRAMES: int = 50
+    # Times in a row a stream that broke off is restarted where it stopped (0 disables)
+    STREAM_RESUME_ATTEMPTS: int = 3
+
+    # Gapless transitions: start the next track's FFmpeg before the current one ends
+    GAPLESS_PLAYBACK: bool = True
+    GAPLESS_PREROLL_SECONDS: float = 5.0
+    GAPLESS_PREBUFFER_FRAMES: int = 50              # 20 ms each
+
+    # Loudness normalization from a once-measured EBU R128 integrated loudness
+    LOUDNESS_NORMALIZATION: bool = True
+    LOUDNESS_TARGET_LUFS: float = -14.0
+    LOUDNESS_MAX_BOOST_DB: float = 6.0              # quiet tracks are raised at most this much
+
+    # Event-loop lag and voice frame timing, logged as JSON every HEALTH_REPORT_INTERVAL seconds
+    HEALTH_MONITOR: bool = True
+    HEALTH_REPORT_INTERVAL: float = 60
+    # The event loop's stack is logged when it is blocked for longer than this
+    SLOW_CALLBACK_SECONDS: float = 0.1
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
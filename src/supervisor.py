@@ -0,0 +1,125 @@
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.process import BaseProcess
+
+logger = logging.getLogger(__name__)
+
+
+def shard_ranges(shard_count: int, workers: int) -> list[list[int]]:
+    """Split shard IDs 0..shard_count-1 across `workers` processes, as evenly as possible."""
+    return [shards for i in range(workers) if (shards := list(range(i, shard_count, workers)))]
+
+
+def _run_worker(shard_ids: list[int], shard_count: int) -> None:
+    # Imported here: the supervisor itself never builds a bot
+    from bot import run_bot
+
+    # Stop like on Ctrl+C, so the bot logs out and the stores are flushed at exit
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    run_bot(shard_ids=shard_ids, shard_count=shard_count)
+
+
+class _Worker:
+    __slots__ = ("shard_ids", "process", "started_at", "restart_delay", "restart_at")
+
+    def __init__(self, shard_ids: list[int]):
+        self.shard_ids = shard_ids
+        self.process: BaseProcess | None = None
+        self.started_at = 0.0
+        self.restart_delay = 0.0
+        self.restart_at: float | None = None
+
+
+class Supervisor:
+    """
+    Runs the bot as several processes on one host, each owning a fixed set of
+    shards (and so of guilds), and restarts workers that die.
+
+    Workers are started `start_interval` seconds apart so their gateway logins
+    don't trip Discord's identify rate limit. A worker that crashes is started
+    again after a delay that doubles for every crash within `stable_after`
+    seconds of its start, up to `max_restart_delay`.
+    """
+
+    def __init__(
+        self,
+        shard_count: int,
+        workers: int,
+        start_interval: float = 5.0,
+        max_restart_delay: float = 60.0,
+        stable_after: float = 300.0,
+    ):
+        if not 1 <= workers <= shard_count:
+            raise ValueError(f"Cannot run {shard_count} shards in {workers} workers")
+        self.shard_count = shard_count
+        self.start_interval = start_interval
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+        self._workers = [_Worker(shards) for shards in shard_ranges(shard_count, workers)]
+        # Spawned, not forked: every worker starts from a clean interpreter
+        self._context = multiprocessing.get_context("spawn")
+        self._stopping = False
+        self.restarts = 0
+
+    def _start(self, worker: _Worker) -> None:
+        worker.process = self._context.Process(
+            target=_run_worker,
+            args=(worker.shard_ids, self.shard_count),
+            name=f"bot-shards-{worker.shard_ids[0]}",
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        logger.info("Started worker %s for shards %s", worker.process.pid, worker.shard_ids)
+
+    def _check(self, worker: _Worker, now: float) -> None:
+        if worker.restart_at is not None:
+            if now >= worker.restart_at:
+                self.restarts += 1
+                self._start(worker)
+            return
+        process = worker.process
+        if process is None or process.is_alive():
+            return
+
+        if now - worker.started_at >= self.stable_after:
+            worker.restart_delay = 0.0
+        worker.restart_delay = min(self.max_restart_delay, max(1.0, worker.restart_delay * 2))
+        worker.restart_at = now + worker.restart_delay
+        logger.error("Worker for shards %s exited with code %s, restarting in %.0f s",
+                     worker.shard_ids, process.exitcode, worker.restart_delay)
+
+    def _stop(self, signum: int, frame) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        """Start all workers and keep them running until SIGINT or SIGTERM."""
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        logger.info("Running %s shards in %s workers", self.shard_count, len(self._workers))
+        try:
+            for i, worker in enumerate(self._workers):
+                if self._stopping:
+                    return
+                if i:
+                    time.sleep(self.start_interval)
+                self._start(worker)
+            while not self._stopping:
+                time.sleep(1.0)
+                now = time.monotonic()
+                for worker in self._workers:
+                    self._check(worker, now)
+        finally:
+            self._shutdown()
+
+    def _shutdown(self) -> None:
+        processes = [w.process for w in self._workers if w.process is not None and w.process.is_alive()]
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+                process.join()
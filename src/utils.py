@@ -111,3 +111,19 @@ def parse_query_and_args(args):
     else:
         # No -- separator, everything is query
         return full_text.strip(), {}
+
+
+def parse_timestamp(text: str) -> int:
+    """
+    Parse a timestamp like "90", "1:30" or "1:02:03" into seconds.
+
+    Raises:
+        ValueError: If the text is not a valid timestamp.
+    """
+    parts = text.strip().split(":")
+    if not 1 <= len(parts) <= 3 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Invalid timestamp: {text}")
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class _Connection:
+    __slots__ = ("guild", "channel", "last_active")
+
+    def __init__(self, guild: discord.Guild, channel: discord.abc.Connectable):
+        self.guild = guild
+        self.channel = channel
+        self.last_active = time.monotonic()
+
+
+class VoiceConnectionManager:
+    """
+    Owns the bot's voice connections, one per guild.
+
+    A connection is reused for every track and command in its guild and kept
+    warm for `idle_timeout` seconds without playback, so the next `!play` skips
+    the voice handshake. After that it is disconnected to free resources.
+
+    If Discord drops the connection (e.g. a gateway reconnect), discord.py tries
+    to resume the voice session by itself. `connect` and `reconnect` give it
+    `resume_wait` seconds to do so. Only then do they tear the connection down
+    and connect again from scratch.
+    """
+
+    def __init__(self, idle_timeout: float = 300, connect_timeout: float = 15, resume_wait: float = 5):
+        self._connections: dict[int, _Connection] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._reaper: asyncio.Task | None = None
+        # Seconds per full connect (voice state update plus voice websocket handshake)
+        # and until a dropped session was usable again
+        self._connect_samples: deque[float] = deque(maxlen=100)
+        self._resume_samples: deque[float] = deque(maxlen=100)
+
+        self.connects = 0
+        self.reuses = 0
+        self.resumes = 0
+        self.reconnects = 0
+        self.failures = 0
+        self.idle_disconnects = 0
+        self.configure(idle_timeout, connect_timeout, resume_wait)
+
+    def configure(self, idle_timeout: float = 300, connect_timeout: float = 15, resume_wait: float = 5) -> None:
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.resume_wait = resume_wait
+
+    def _lock(self, guild_id: int) -> asyncio.Lock:
+        lock = self._locks.get(guild_id)
+        if lock is None:
+            lock = self._locks[guild_id] = asyncio.Lock()
+        return lock
+
+    def touch(self, guild_id: int) -> None:
+        """Mark a guild's connection as in use, restarting its idle window."""
+        connection = self._connections.get(guild_id)
+        if connection is not None:
+            connection.last_active = time.monotonic()
+
+    async def connect(self, channel: discord.abc.Connectable) -> discord.VoiceClient:
+        """Return a connected voice client for the channel, reusing the guild's connection if possible."""
+        guild = channel.guild  # type: ignore[attr-defined]
+        async with self._lock(guild.id):
+            voice_client: discord.VoiceClient | None = guild.voice_client  # type: ignore[assignment]
+            if voice_client is not None and voice_client.is_connected():
+                self.reuses += 1
+            else:
+                voice_client = await self._establish(guild, channel, voice_client)
+            self._connections[guild.id] = _Connection(guild, voice_client.channel)
+            return voice_client
+
+    async def reconnect(self, guild_id: int) -> discord.VoiceClient | None:
+        """
+        Return a connected voice client for the channel the guild was last connected
+        to, or None if the bot was never connected there or was disconnected on purpose.
+        """
+        connection = self._connections.get(guild_id)
+        if connection is None:
+            return None
+        voice_client: discord.VoiceClient | None = connection.guild.voice_client  # type: ignore[assignment]
+        if voice_client is not None and voice_client.is_connected():
+            return voice_client
+        try:
+            return await self.connect(connection.channel)
+        except Exception as exc:
+            logger.warning("Could not reconnect to voice in guild %s: %s", guild_id, exc)
+            return None
+
+    async def _establish(
+        self,
+        guild: discord.Guild,
+        channel: discord.abc.Connectable,
+        stale: discord.VoiceClient | None,
+    ) -> discord.VoiceClient:
+        started = time.perf_counter()
+        if stale is not None:
+            # A dropped connection: give discord.py's own session resume a moment
+            deadline = started + self.resume_wait
+            while not stale.is_connected() and time.perf_counter() < deadline:
+                await asyncio.sleep(0.1)
+            if stale.is_connected():
+                self.resumes += 1
+                self._resume_samples.append(time.perf_counter() - started)
+                logger.info("Voice session in guild %s resumed", guild.id)
+                return stale
+            await stale.disconnect(force=True)
+            self.reconnects += 1
+
+        try:
+            voice_client = await channel.connect(timeout=self.connect_timeout, reconnect=True)
+        except Exception:
+            self.failures += 1
+            raise
+        elapsed = time.perf_counter() - started
+        self.connects += 1
+        self._connect_samples.append(elapsed)
+        logger.info("Connected to voice in guild %s in %.0f ms", guild.id, elapsed * 1000)
+        return voice_client  # type: ignore[return-value]
+
+    async def disconnect(self, guild_id: int) -> None:
+        """Leave voice in a guild; `reconnect` won't bring the connection back."""
+        connection = self._connections.pop(guild_id, None)
+        if connection is None:
+            return
+        voice_client = connection.guild.voice_client
+        if voice_client is not None:
+            await voice_client.disconnect(force=False)
+
+    def start(self) -> None:
+        """Start the background task that disconnects idle guilds."""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._disconnect_idle())
+
+    async def _disconnect_idle(self) -> None:
+        interval = max(1.0, min(30.0, self.idle_timeout / 4))
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for guild_id, connection in list(self._connections.items()):
+                voice_client: discord.VoiceClient | None = connection.guild.voice_client  # type: ignore[assignment]
+                if voice_client is None:
+                    # Disconnected elsewhere, e.g. by the player cleanup
+                    self._connections.pop(guild_id, None)
+                elif voice_client.is_playing() or voice_client.is_paused():
+                    connection.last_active = now
+                elif now - connection.last_active > self.idle_timeout:
+                    logger.info("Disconnecting idle voice connection in guild %s", guild_id)
+                    self.idle_disconnects += 1
+                    try:
+                        await self.disconnect(guild_id)
+                    except Exception as exc:
+                        logger.warning("Failed to disconnect voice in guild %s: %s", guild_id, exc)
+
+    def stats(self) -> dict[str, float]:
+        """Return connection counters and connect/resume latencies in milliseconds."""
+        stats: dict[str, float] = {
+            "connected": sum(
+                1 for c in self._connections.values() if c.guild.voice_client is not None
+            ),
+            "connects": self.connects,
+            "reuses": self.reuses,
+            "resumes": self.resumes,
+            "reconnects": self.reconnects,
+            "failures": self.failures,
+            "idle_disconnects": self.idle_disconnects,
+        }
+        for name, samples in (("connect", self._connect_samples), ("resume", self._resume_samples)):
+            if samples:
+                stats[f"{name}_median_ms"] = statistics.median(samples) * 1000
+                stats[f"{name}_max_ms"] = max(samples) * 1000
+        # Heartbeat round trip of the live voice websockets
+        latencies = [
+            c.guild.voice_client.latency * 1000
+            for c in self._connections.values()
+            if c.guild.voice_client is not None and c.guild.voice_client.latency != float("inf")
+        ]
+        if latencies:
+            stats["voice_latency_mean_ms"] = statistics.mean(latencies)
+        return stats
+
+
+# Global manager shared by all guilds
+voice_connections = VoiceConnectionManager()
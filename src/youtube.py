@@ -1,104 +1,588 @@
 import asyncio
+import atexit
 import logging
-from typing import List
+import re
+import signal
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List
+from urllib.parse import parse_qs, urlparse
 
 from pydantic import BaseModel
-from yt_dlp import YoutubeDL
 from exceptions import PlaybackError
+from extraction_executor import Priority, extraction_executor
+from metadata_cache import MetadataCache, SearchCache, parse_stream_expiry
+from metadata_store import MetadataStore
+from single_flight import SingleFlight
+from ytdl_pool import YoutubeDLPool
 
 logger = logging.getLogger(__name__)
 
 
 class YouTubeMetadata(BaseModel):
-    """Subset of the metadata we care about for playback/showing embeds."""
+    """
+    Subset of the metadata we care about for playback/showing embeds.
+
+    Instances built from yt-dlp results or the metadata store use `model_construct`,
+    since those fields are already converted to the right types and validation
+    would only add overhead.
+    """
     title: str
     duration: int          # seconds
     thumbnail: str
     webpage_url: str
     stream_url: str | None = None
+    video_id: str | None = None
+    codec: str | None = None   # audio codec of stream_url, e.g. "opus"
+    loudness: float | None = None  # integrated loudness in LUFS, once measured (see loudness.py)
 
 
-async def search_youtube(query: str, limit: int = 5) -> List[YouTubeMetadata]:
-    """Search YouTube for videos matching the query."""
-    def _sync_search(search_query: str, max_results: int) -> List[YouTubeMetadata]:
-        ydl_opts = {
-            "skip_download": True,
-            "quiet": False,
-            "socket_timeout": 10,
-            "extractor_args": {
-                "youtube": {
-                    "player_client": ["android", "web"]
-                }
-            },
-            "http_headers": {
-                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"
-            },
-            "logger": logger,
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+
+def parse_video_id(url: str) -> str | None:
+    """Return the canonical 11-character video ID of a YouTube URL, or None."""
+    if _VIDEO_ID_RE.match(url):
+        return url
+
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    host = (parsed.hostname or "").lower()
+    candidate = None
+    if host.endswith("youtu.be"):
+        candidate = parsed.path.lstrip("/").split("/")[0]
+    elif host.endswith("youtube.com") or host.endswith("youtube-nocookie.com"):
+        if parsed.path == "/watch":
+            candidate = parse_qs(parsed.query).get("v", [None])[0]
+        else:
+            parts = parsed.path.strip("/").split("/")
+            if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+                candidate = parts[1]
+
+    if candidate and _VIDEO_ID_RE.match(candidate):
+        return candidate
+    return None
+
+
+def parse_playlist_id(url: str) -> str | None:
+    """Return the playlist ID of a YouTube playlist page URL (`/playlist?list=...`), or None."""
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    host = (parsed.hostname or "").lower()
+    if not host.endswith("youtube.com") or parsed.path != "/playlist":
+        return None
+    return parse_qs(parsed.query).get("list", [None])[0]
+
+
+def video_url(video_id: str) -> str:
+    """Return the canonical watch URL for a video ID."""
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query for use as a cache key."""
+    return " ".join(query.lower().split())
+
+
+# Shared yt-dlp options for searches
+SEARCH_OPTS = {
+    "skip_download": True,
+    "quiet": False,
+    "socket_timeout": 10,
+    "extractor_args": {
+        "youtube": {
+            "player_client": ["android", "web"]
         }
-        
-        with YoutubeDL(ydl_opts) as ydl:
-            # Search for videos
-            search_results = ydl.extract_info(
-                f"ytsearch{max_results}:{search_query}",
-                download=False
+    },
+    "http_headers": {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"
+    },
+    "logger": logger,
+}
+
+# Shared yt-dlp options for single-video extraction
+EXTRACT_OPTS = {
+    "skip_download":    True,
+    "quiet":            False,           # for debugging
+    "dump_single_json": True,
+    "format":           "bestaudio/best",
+    "socket_timeout":   10,
+    "noplaylist":       True,
+    "playlist_items":   "1",
+    "extractor_args": {
+        "youtube": {
+            "player_client": ["android", "web"]
+        }
+    },
+    "http_headers": {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    },
+    "logger": logger,                     # attach your yt-dlp logger
+}
+
+# Shared yt-dlp options for listing playlists without resolving each entry
+PLAYLIST_OPTS = {
+    "skip_download": True,
+    "quiet": False,
+    "socket_timeout": 10,
+    "extract_flat": "in_playlist",
+    "lazy_playlist": True,
+    "http_headers": {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64)"
+    },
+    "logger": logger,
+}
+
+# Metadata and stream URLs of recently resolved videos, keyed by video ID
+metadata_cache = MetadataCache()
+# Recent search results per normalized query
+search_cache = SearchCache()
+_refreshing: dict[str, asyncio.Task] = {}
+
+# Normalized query -> video ID of the top hit, for skipping the search on repeats
+_top_hits: OrderedDict[str, str] = OrderedDict()
+_TOP_HITS_MAX = 1024
+
+# Optional persistent store that survives restarts (see init_metadata_store)
+metadata_store: MetadataStore | None = None
+
+# Long-lived YoutubeDL instances, checked out by the worker threads
+search_pool = YoutubeDLPool(SEARCH_OPTS, warm_extractors=("YoutubeSearch", "Youtube"))
+extract_pool = YoutubeDLPool(EXTRACT_OPTS, warm_extractors=("Youtube",))
+playlist_pool = YoutubeDLPool(PLAYLIST_OPTS, size=2)
+# Playlists listed at once; the others wait here instead of holding a thread
+_playlist_slots = asyncio.Semaphore(playlist_pool.size)
+
+# Concurrent identical searches/extractions share one yt-dlp run
+lookups = SingleFlight()
+
+# Upper bound on entries taken from a single playlist
+playlist_max_entries = 1000
+
+# Search results whose stream URLs are extracted while the user is still choosing
+speculative_results = 3
+
+
+def init_pools(size: int) -> None:
+    """Set the number of YoutubeDL instances per pool and create them."""
+    for pool in (search_pool, extract_pool):
+        pool.resize(size)
+        pool.warm_up()
+
+
+def close_pools() -> None:
+    """Close all pooled YoutubeDL instances."""
+    search_pool.close()
+    extract_pool.close()
+    playlist_pool.close()
+
+
+def init_worker(pool_size: int) -> None:
+    """Initializer of extraction worker processes: build and warm this process's pools."""
+    # Ctrl+C is handled by the bot process, which shuts the workers down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    init_pools(pool_size)
+
+
+def configure_extraction(workers: int, max_pending: int, backend: str) -> None:
+    """Size the extraction executor and choose between worker threads and processes."""
+    extraction_executor.configure(
+        workers,
+        max_pending,
+        backend=backend,
+        # A worker process runs one job at a time, so one instance per pool is enough
+        initializer=init_worker,
+        initargs=(1,),
+        preload=(__name__,),
+    )
+
+
+def init_metadata_store(path: Path, max_entries: int) -> None:
+    """Open the SQLite metadata store; it is flushed and closed at interpreter exit."""
+    global metadata_store
+    metadata_store = MetadataStore(path, max_entries=max_entries)
+    atexit.register(metadata_store.close)
+
+
+def _metadata_from_row(row: dict, with_stream: bool = True) -> YouTubeMetadata:
+    return YouTubeMetadata.model_construct(
+        title=row["title"],
+        duration=row["duration"],
+        thumbnail=row["thumbnail"],
+        webpage_url=row["webpage_url"],
+        stream_url=row["stream_url"] if with_stream else None,
+        video_id=row["video_id"],
+        loudness=row["loudness"],
+    )
+
+
+def _store_video(meta: YouTubeMetadata) -> None:
+    if metadata_store is None or not meta.video_id:
+        return
+    metadata_store.put_video(
+        meta.video_id,
+        meta.title,
+        meta.duration,
+        meta.thumbnail,
+        meta.webpage_url,
+        meta.stream_url,
+        parse_stream_expiry(meta.stream_url),
+    )
+
+
+def _load_from_store(video_id: str) -> bool:
+    """Copy a stored video into the in-memory cache. Returns False if it isn't stored."""
+    if metadata_store is None:
+        return False
+    row = metadata_store.get_video(video_id)
+    if row is None:
+        return False
+    metadata_cache.put(_metadata_from_row(row))
+    return True
+
+
+def set_loudness(video_id: str, loudness: float) -> None:
+    """Remember the measured integrated loudness (LUFS) of a video in the cache and the store."""
+    metadata_cache.set_loudness(video_id, loudness)
+    if metadata_store is not None:
+        metadata_store.put_loudness(video_id, loudness)
+
+
+# Field order of the tuples the `_sync_*` workers return. Plain tuples are cheap to
+# pickle when the workers run in separate processes.
+_PACKED_FIELDS = ("title", "duration", "thumbnail", "webpage_url", "stream_url", "video_id", "codec")
+
+
+def _pack(meta: YouTubeMetadata) -> tuple:
+    return tuple(getattr(meta, field) for field in _PACKED_FIELDS)
+
+
+def _unpack(packed: tuple) -> YouTubeMetadata:
+    return YouTubeMetadata.model_construct(**dict(zip(_PACKED_FIELDS, packed)))
+
+
+def _sync_search(search_query: str, max_results: int) -> List[tuple]:
+    with search_pool.checkout() as ydl:
+        # Search for videos
+        search_results = ydl.extract_info(
+            f"ytsearch{max_results}:{search_query}",
+            download=False
+        )
+
+    results = []
+    for entry in search_results.get("entries", []):
+        if entry:
+            results.append(_pack(YouTubeMetadata.model_construct(
+                title=entry["title"],
+                duration=int(entry["duration"]),
+                thumbnail=entry["thumbnail"],
+                webpage_url=entry["webpage_url"],
+                # stream_url is not available in search results
+                video_id=entry.get("id"),
+            )))
+    return results
+
+
+def _metadata_from_info(info: dict) -> YouTubeMetadata:
+    return YouTubeMetadata.model_construct(
+        title       = info["title"],
+        duration    = int(info["duration"]),
+        thumbnail   = info["thumbnail"],
+        webpage_url = info["webpage_url"],
+        stream_url  = info["url"],
+        video_id    = info.get("id"),
+        codec       = info.get("acodec"),
+    )
+
+
+def _sync_extract(target_url: str) -> tuple:
+    with extract_pool.checkout() as ydl:
+        info = ydl.extract_info(target_url, download=False)
+    return _pack(_metadata_from_info(info))
+
+
+def _sync_resolve(search_query: str) -> tuple | None:
+    # With the extraction options the top search hit is fully processed, so the
+    # entry already carries the selected audio format's URL.
+    with extract_pool.checkout() as ydl:
+        search_results = ydl.extract_info(f"ytsearch1:{search_query}", download=False)
+    entries = [entry for entry in search_results.get("entries") or [] if entry]
+    if not entries:
+        return None
+    return _pack(_metadata_from_info(entries[0]))
+
+
+def _sync_iter_playlist(url: str, max_entries: int, stop: threading.Event) -> Iterator[YouTubeMetadata]:
+    with playlist_pool.checkout() as ydl:
+        # process=False keeps `entries` lazy, so pages are only fetched as we iterate
+        playlist = ydl.extract_info(url, download=False, process=False)
+        for count, entry in enumerate(playlist.get("entries") or []):
+            if stop.is_set() or count >= max_entries:
+                break
+            if not entry or not entry.get("id"):
+                continue
+            thumbnails = entry.get("thumbnails") or []
+            yield YouTubeMetadata.model_construct(
+                title=entry.get("title") or entry["id"],
+                duration=int(entry.get("duration") or 0),
+                thumbnail=thumbnails[-1]["url"] if thumbnails else f"https://i.ytimg.com/vi/{entry['id']}/hqdefault.jpg",
+                webpage_url=video_url(entry["id"]),
+                video_id=entry["id"],
             )
-            
-            results = []
-            for entry in search_results.get("entries", []):
-                if entry:
-                    results.append(YouTubeMetadata(
-                        title=entry["title"],
-                        duration=int(entry["duration"]),
-                        thumbnail=entry["thumbnail"],
-                        webpage_url=entry["webpage_url"],
-                        # stream_url is not available in search results
-                    ))
+
+
+def configure_playlists(max_entries: int) -> None:
+    """Set how many entries are taken from a single playlist."""
+    global playlist_max_entries
+    playlist_max_entries = max_entries
+
+
+async def iter_playlist(url: str) -> AsyncIterator[YouTubeMetadata]:
+    """
+    Yield the entries of a playlist as they are listed, without resolving stream URLs.
+
+    Listing runs in a worker thread and pages are fetched lazily, so the first
+    entries arrive while the rest of the playlist is still being enumerated.
+    Stopping the iteration early stops the listing.
+
+    The thread runs for as long as the listing does, so it doesn't go through the
+    extraction executor, whose workers would be tied up for the whole playlist.
+    Instead at most one listing per `playlist_pool` instance runs at a time.
+    """
+    loop = asyncio.get_running_loop()
+    entries: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def _produce() -> None:
+        try:
+            for meta in _sync_iter_playlist(url, playlist_max_entries, stop):
+                loop.call_soon_threadsafe(entries.put_nowait, meta)
+        except Exception as exc:
+            loop.call_soon_threadsafe(entries.put_nowait, exc)
+        finally:
+            loop.call_soon_threadsafe(entries.put_nowait, done)
+            # Held until the thread is done with its pooled instance, even if the caller stopped early
+            loop.call_soon_threadsafe(_playlist_slots.release)
+
+    await _playlist_slots.acquire()
+    asyncio.ensure_future(asyncio.to_thread(_produce))
+    try:
+        while True:
+            item = await entries.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise PlaybackError(f"Failed to list playlist: {item}") from item
+            # Not cached: the queue entry keeps the listing metadata, and flat entries
+            # (no stream URL) would only push resolved stream URLs out of the cache
+            yield item
+    finally:
+        # The producer thread notices this before its next entry and exits on its own
+        stop.set()
+
+
+async def search_youtube(
+    query: str,
+    limit: int = 5,
+    *,
+    guild_id: int | None = None,
+    priority: Priority = Priority.NOW_PLAYING,
+) -> List[YouTubeMetadata]:
+    """Search YouTube for videos matching the query."""
+    normalized = normalize_query(query)
+    cached = search_cache.get(normalized, limit)
+    if cached is not None:
+        return cached
+    if metadata_store is not None:
+        rows = metadata_store.get_search(normalized, limit)
+        if rows is not None:
+            results = [_metadata_from_row(row, with_stream=False) for row in rows]
+            search_cache.put(normalized, limit, results)
             return results
-    
+
+    return await lookups.run(
+        ("search", normalized, limit),
+        lambda: _search_uncached(query, normalized, limit, guild_id, priority),
+    )
+
+
+async def _search_uncached(
+    query: str, normalized: str, limit: int, guild_id: int | None, priority: Priority
+) -> List[YouTubeMetadata]:
     try:
-        return await asyncio.wait_for(
-            asyncio.to_thread(_sync_search, query, limit),
-            timeout=30.0,
+        packed = await extraction_executor.run(
+            _sync_search, query, limit, guild_id=guild_id, priority=priority, timeout=30.0
         )
     except asyncio.TimeoutError:
         raise PlaybackError("Timed out while searching for videos.")
+    results = [_unpack(result) for result in packed]
 
-
-async def extract_info(url: str) -> YouTubeMetadata:
-    def _sync_extract(target_url: str) -> YouTubeMetadata:
-        ydl_opts = {
-            "skip_download":    True,
-            "quiet":            False,           # for debugging
-            "dump_single_json": True,
-            "format":           "bestaudio/best",
-            "socket_timeout":   10,
-            "noplaylist":       True,
-            "playlist_items":   "1",
-            "extractor_args": {
-                "youtube": {
-                    "player_client": ["android", "web"]
-                }
-            },
-            "http_headers": {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
-            "logger": logger,                     # attach your yt-dlp logger
-        }
-        with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(target_url, download=False)
-        return YouTubeMetadata(
-            title       = info["title"],
-            duration    = int(info["duration"]),
-            thumbnail   = info["thumbnail"],
-            webpage_url = info["webpage_url"],
-            stream_url  = info["url"],
+    for result in results:
+        metadata_cache.put(result)
+        _store_video(result)
+    if results and results[0].video_id:
+        _remember_top_hit(normalized, results[0].video_id)
+    search_cache.put(normalized, limit, results)
+    if metadata_store is not None:
+        metadata_store.put_search(
+            normalized,
+            limit,
+            [result.video_id for result in results if result.video_id],
+            exhausted=len(results) < limit,
         )
+    return results
 
+
+async def _extract_uncached(url: str, guild_id: int | None, priority: Priority) -> YouTubeMetadata:
+    # Priority is part of the key so a user's request never ends up waiting
+    # behind a queued background job for the same video
+    return await lookups.run(("extract", url, priority), lambda: _run_extract(url, guild_id, priority))
+
+
+async def _run_extract(url: str, guild_id: int | None, priority: Priority) -> YouTubeMetadata:
     try:
-        return await asyncio.wait_for(
-            asyncio.to_thread(_sync_extract, url),
-            timeout=30.0,
-        )
+        meta = _unpack(await extraction_executor.run(
+            _sync_extract, url, guild_id=guild_id, priority=priority, timeout=30.0
+        ))
     except asyncio.TimeoutError:
         raise PlaybackError("Timed out while fetching video info.")
 
+    metadata_cache.put(meta)
+    _store_video(meta)
+    if meta.video_id:
+        # Re-extracting a known video keeps its measured loudness
+        meta.loudness = metadata_cache.loudness(meta.video_id)
+    return meta
+
+
+async def _refresh_stream(video_id: str, guild_id: int | None) -> None:
+    """Re-extract a cached video whose stream URL is about to expire."""
+    try:
+        await _extract_uncached(video_url(video_id), guild_id, Priority.PREFETCH)
+        metadata_cache.refreshes += 1
+    except Exception as exc:
+        logger.warning("Background refresh of %s failed: %s", video_id, exc)
+    finally:
+        _refreshing.pop(video_id, None)
+
+
+async def extract_info(
+    url: str,
+    refresh: bool = False,
+    *,
+    guild_id: int | None = None,
+    priority: Priority = Priority.NOW_PLAYING,
+) -> YouTubeMetadata:
+    """
+    Return metadata including a fresh stream URL, served from the cache when possible.
+    With `refresh` the cache is bypassed and a new stream URL is extracted.
+    `guild_id` and `priority` decide where the extraction is queued if one is needed.
+    """
+    video_id = parse_video_id(url)
+    if video_id is None:
+        return await _extract_uncached(url, guild_id, priority)
+    if refresh:
+        return await _extract_uncached(video_url(video_id), guild_id, priority)
+
+    cached = metadata_cache.get_playable(video_id)
+    if cached is None and _load_from_store(video_id):
+        cached = metadata_cache.get_playable(video_id)
+    if cached is None:
+        return await _extract_uncached(video_url(video_id), guild_id, priority)
+
+    if metadata_cache.needs_refresh(video_id) and video_id not in _refreshing:
+        _refreshing[video_id] = asyncio.create_task(_refresh_stream(video_id, guild_id))
+    return cached
+
+
+def configure_speculation(results: int) -> None:
+    """Set how many displayed search results are extracted ahead of a selection (0 disables)."""
+    global speculative_results
+    speculative_results = results
+
+
+async def _speculate(url: str, guild_id: int | None) -> None:
+    try:
+        await extract_info(url, guild_id=guild_id, priority=Priority.SPECULATIVE)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logger.debug("Speculative extraction of %s failed: %s", url, exc)
+
+
+def speculate(results: List[YouTubeMetadata], *, guild_id: int | None = None) -> List[asyncio.Task]:
+    """
+    Start low-priority stream URL extraction for the first search results, top hit
+    first, so that picking one of them can start playback straight from the cache.
+
+    Returns one task per speculated result, in result order. Cancel the ones that
+    are not needed any more; queued extractions are then dropped.
+    """
+    return [
+        asyncio.create_task(_speculate(result.webpage_url, guild_id))
+        for result in results[:speculative_results]
+    ]
+
+
+def expedite(url: str) -> bool:
+    """
+    Move a still queued speculative extraction of `url` up to the user-facing
+    priority. Returns False if there is none waiting.
+    """
+    video_id = parse_video_id(url)
+    return extraction_executor.promote(_sync_extract, video_url(video_id) if video_id else url)
+
+
+def _cached_top_hit(normalized: str) -> str | None:
+    video_id = _top_hits.get(normalized)
+    if video_id is not None:
+        _top_hits.move_to_end(normalized)
+        return video_id
+    if metadata_store is not None:
+        rows = metadata_store.get_search(normalized, 1)
+        if rows:
+            return rows[0]["video_id"]
+    return None
+
+
+def _remember_top_hit(normalized: str, video_id: str) -> None:
+    _top_hits[normalized] = video_id
+    _top_hits.move_to_end(normalized)
+    while len(_top_hits) > _TOP_HITS_MAX:
+        _top_hits.popitem(last=False)
+
+
+async def resolve_query(query: str, *, guild_id: int | None = None) -> YouTubeMetadata | None:
+    """
+    Return playable metadata (including stream URL) for the top search hit of `query`.
+
+    Known queries skip the search and go straight to `extract_info`, which is usually
+    answered from the cache. Otherwise search and extraction happen in one yt-dlp run.
+    Returns None if the search has no results.
+    """
+    normalized = normalize_query(query)
+    video_id = _cached_top_hit(normalized)
+    if video_id is not None:
+        return await extract_info(video_url(video_id), guild_id=guild_id)
+
+    return await lookups.run(("resolve", normalized), lambda: _resolve_uncached(query, normalized, guild_id))
+
+
+async def _resolve_uncached(query: str, normalized: str, guild_id: int | None) -> YouTubeMetadata | None:
+    try:
+        packed = await extraction_executor.run(_sync_resolve, query, guild_id=guild_id, timeout=30.0)
+    except asyncio.TimeoutError:
+        raise PlaybackError("Timed out while searching for videos.")
+    if packed is None:
+        return None
+    meta = _unpack(packed)
+
+    metadata_cache.put(meta)
+    _store_video(meta)
+    if meta.video_id:
+        # A top hit that was played before keeps its measured loudness
+        meta.loudness = metadata_cache.loudness(meta.video_id)
+        _remember_top_hit(normalized, meta.video_id)
+        if metadata_store is not None:
+            metadata_store.put_search(normalized, 1, [meta.video_id])
+    return meta
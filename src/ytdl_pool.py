@@ -0,0 +1,107 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from yt_dlp import YoutubeDL
+
+logger = logging.getLogger(__name__)
+
+
+class YoutubeDLPool:
+    """
+    Pool of long-lived `YoutubeDL` instances that all share one set of options.
+
+    Building a `YoutubeDL` loads the extractor registry and sets up a fresh HTTP
+    session, so doing it per call is expensive. Instances are created lazily up to
+    `size` and handed out to one worker thread at a time, which keeps the
+    (not thread-safe) instances isolated while still reusing them.
+    """
+
+    def __init__(self, ydl_opts: dict[str, Any], size: int = 4, warm_extractors: tuple[str, ...] = ()):
+        self._opts = ydl_opts
+        self._size = max(1, size)
+        self._warm_extractors = warm_extractors
+        self._idle: queue.LifoQueue[YoutubeDL] = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def resize(self, size: int) -> None:
+        """Change the maximum number of instances (only grows the pool lazily)."""
+        with self._lock:
+            self._size = max(1, size)
+
+    def _create(self) -> YoutubeDL:
+        ydl = YoutubeDL(self._opts)
+        for ie_key in self._warm_extractors:
+            # Instantiating the extractor up front moves the import/initialisation cost
+            # out of the first real request.
+            ydl.get_info_extractor(ie_key)
+        return ydl
+
+    def _acquire(self, timeout: float | None) -> YoutubeDL:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self._size
+            if can_create:
+                # Reserve the slot now, build outside the lock.
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No YoutubeDL instance became available in time.") from None
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None) -> Iterator[YoutubeDL]:
+        """Borrow an instance for the duration of the `with` block."""
+        ydl = self._acquire(timeout)
+        try:
+            yield ydl
+        finally:
+            self._idle.put(ydl)
+
+    def warm_up(self) -> None:
+        """Create every instance of the pool so the first requests don't pay for it."""
+        borrowed = []
+        try:
+            while True:
+                with self._lock:
+                    if self._created >= self._size:
+                        break
+                borrowed.append(self._acquire(timeout=None))
+        finally:
+            for ydl in borrowed:
+                self._idle.put(ydl)
+        logger.info("Warmed up YoutubeDL pool with %d instance(s)", self._created)
+
+    def close(self) -> None:
+        """Close all idle instances. Instances still checked out are left to the GC."""
+        while True:
+            try:
+                ydl = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            try:
+                ydl.close()
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Failed to close YoutubeDL instance: %s", exc)